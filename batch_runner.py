@@ -0,0 +1,230 @@
+# Batch runner: run the crew for many brands in a bounded process pool
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+
+# Agents are built once per worker process and reused for every brand it runs
+_worker_agents = None
+_worker_run_options = {}  # Extra keyword arguments for run_brand (test_mode, cache_mode, resume, log_mode, context_budget, process, bounded_memory)
+
+
+def load_brand_inputs(source):
+    """
+    Collect brands from a directory of *.json files or a JSONL file.
+    Returns a list of (label, brand_data) pairs; unreadable entries are kept
+    with brand_data=None so they show up as failures in the summary.
+    """
+    brands = []
+    if os.path.isdir(source):
+        for filename in sorted(os.listdir(source)):
+            if not filename.endswith('.json'):
+                continue
+            path = os.path.join(source, filename)
+            try:
+                with open(path) as f:
+                    brands.append((path, _brand_object(path, json.load(f))))
+            except Exception as e:
+                print(f"[BATCH] ERROR: Could not parse {path}: {e}")
+                brands.append((path, None))
+    else:
+        with open(source) as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                label = f"{source}:{line_no}"
+                try:
+                    brands.append((label, _brand_object(label, json.loads(line))))
+                except Exception as e:
+                    print(f"[BATCH] ERROR: Could not parse {label}: {e}")
+                    brands.append((label, None))
+    return brands
+
+
+def _brand_object(label, data):
+    # A brand must be a JSON object; anything else ([1, 2], "x") counts as unreadable
+    if not isinstance(data, dict):
+        print(f"[BATCH] ERROR: {label} is not a JSON object")
+        return None
+    return data
+
+
+def assign_slugs(brands):
+    """
+    Give every brand a unique output slug so two brands with the same name
+    don't write into the same output folder.
+    """
+    from crew_setup import slugify
+
+    seen = {}
+    slugs = []
+    for _, brand_data in brands:
+        base = slugify((brand_data or {}).get('name', 'unknown_brand')) or 'unknown_brand'
+        seen[base] = seen.get(base, 0) + 1
+        slugs.append(base if seen[base] == 1 else f"{base}_{seen[base]}")
+    return slugs
+
+
+def _init_worker(roles_path, run_options, workers=1):
+    global _worker_agents, _worker_run_options
+    from dotenv import load_dotenv
+    from crew_setup import load_roles
+    from tools.resilience import set_rate_share
+
+    load_dotenv()
+    # Each worker gets an equal share of every provider's rate limit
+    set_rate_share(1 / workers)
+    _worker_agents = load_roles(roles_path, cache_mode=run_options["cache_mode"])
+    _worker_run_options = run_options
+
+
+def _failure_reason(output_dir):
+    # safe_kickoff writes "FAILURE\n<error>" to crew_status.txt
+    try:
+        with open(os.path.join(output_dir, "crew_status.txt")) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    return lines[1] if len(lines) > 1 and lines[0] == "FAILURE" else None
+
+
+def _run_one(label, brand_data, brand_slug, overrides=None):
+    """
+    Run one brand in a worker. `overrides` replaces some of the worker's
+    run options for this brand only (the job server uses it per job).
+    """
+    from crew_setup import run_brand
+
+    started = time.perf_counter()
+    record = {"source": label, "slug": brand_slug, "pid": os.getpid()}
+    try:
+        run = run_brand(brand_data, agents=_worker_agents, brand_slug=brand_slug,
+                        **{**_worker_run_options, **(overrides or {})})
+        record.update(brand=run["brand"], output_dir=run["output_dir"], status=run["status"],
+                      peak_rss_mb=run["peak_rss_mb"])
+        if run["status"] != "SUCCESS":
+            record["error"] = _failure_reason(run["output_dir"])
+    except Exception as e:
+        # Anything that escapes run_brand still only fails this brand
+        output_dir = os.path.join('output', brand_slug)
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, "crew_status.txt"), "w") as f:
+            f.write(f"FAILURE\n{e}\n{traceback.format_exc()}")
+        record.update(brand=(brand_data or {}).get('name', 'unknown_brand'), output_dir=output_dir,
+                      status="FAILURE", error=str(e))
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def run_batch(brands, workers=2, roles_path='roles.json', test_mode=True, cache_mode="use", resume=False,
+              log_mode="full", context_budget=None, process="sequential", bounded_memory=False):
+    """
+    Run every brand through the crew using `workers` processes.
+    Returns the per-brand records and an aggregate summary dict.
+    """
+    slugs = assign_slugs(brands)
+    records = []
+    started = time.perf_counter()
+    run_options = dict(test_mode=test_mode, cache_mode=cache_mode, resume=resume, log_mode=log_mode, process=process,
+                       bounded_memory=bounded_memory)
+    if context_budget is not None:
+        run_options["context_budget"] = context_budget
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(roles_path, run_options, workers)) as pool:
+        futures = {}
+        for (label, brand_data), slug in zip(brands, slugs):
+            if brand_data is None:
+                records.append({"source": label, "slug": slug, "status": "FAILURE",
+                                "error": "unreadable brand input", "seconds": 0.0})
+                continue
+            futures[pool.submit(_run_one, label, brand_data, slug)] = (label, slug)
+
+        for future in as_completed(futures):
+            label, slug = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. BrokenProcessPool)
+                record = {"source": label, "slug": slug, "status": "FAILURE",
+                          "error": f"worker crashed: {e}", "seconds": None}
+            records.append(record)
+            icon = "✅" if record["status"] == "SUCCESS" else "❌"
+            rss = f", peak {record['peak_rss_mb']} MB" if record.get("peak_rss_mb") is not None else ""
+            print(f"{icon} {record['slug']}: {record['status']} ({record.get('seconds')}s{rss})")
+
+    wall_seconds = time.perf_counter() - started
+    succeeded = sum(1 for r in records if r["status"] == "SUCCESS")
+    brand_seconds = [r["seconds"] for r in records if r.get("seconds")]
+    peak_rss = [r["peak_rss_mb"] for r in records if r.get("peak_rss_mb") is not None]
+    summary = {
+        "finished_at": datetime.now().isoformat(timespec='seconds'),
+        "workers": workers,
+        "brands": len(records),
+        "succeeded": succeeded,
+        "failed": len(records) - succeeded,
+        "wall_seconds": round(wall_seconds, 3),
+        "mean_brand_seconds": round(sum(brand_seconds) / len(brand_seconds), 3) if brand_seconds else None,
+        "brands_per_hour": round(len(records) / wall_seconds * 3600, 2) if wall_seconds else None,
+        "max_brand_peak_rss_mb": max(peak_rss) if peak_rss else None,  # for sizing worker containers
+    }
+    return records, summary
+
+
+def main(argv=None):
+    from crew_setup import add_cache_arguments, cache_mode_from_args
+    from tools.logger import LOG_MODES, LOG_QUIET
+    from tools.task_graph import PROCESS_MODES, PROCESS_SEQUENTIAL
+
+    parser = argparse.ArgumentParser(description="Run the creative crew for many brands in parallel.")
+    parser.add_argument("source", help="Directory of brand *.json files or a JSONL file with one brand per line")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Number of worker processes")
+    parser.add_argument("--roles", default="roles.json", help="Path to the roles JSON file")
+    parser.add_argument("--no-test-mode", action="store_true", help="Disable agent test output files")
+    parser.add_argument("--resume", action="store_true", help="Skip each brand's tasks that already have a checkpoint")
+    parser.add_argument("--bounded-memory", action="store_true",
+                        help="Keep only summaries of finished task outputs in memory, for long-lived workers")
+    parser.add_argument("--normalize-images", action="store_true",
+                        help="Verify mood board images and write derivatives, thumbnails and a manifest (needs Pillow)")
+    parser.add_argument("--log-mode", choices=LOG_MODES, default=LOG_QUIET,
+                        help="What to keep in each brand's crew_log.txt")
+    parser.add_argument("--process", choices=PROCESS_MODES, default=PROCESS_SEQUENTIAL,
+                        help="Run each brand's tasks one after another, or independent tasks concurrently")
+    parser.add_argument("--context-budget", type=int, help="Token budget per task prompt (default: crew_setup's)")
+    add_cache_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.normalize_images:
+        os.environ["MOOD_BOARD_NORMALIZE"] = "1"  # inherited by the worker processes
+
+    brands = load_brand_inputs(args.source)
+    if not brands:
+        print(f"[BATCH] No brands found in {args.source}")
+        return 1
+
+    print(f"🚚 Running {len(brands)} brand(s) with {args.workers} worker(s)")
+    records, summary = run_batch(brands, workers=args.workers, roles_path=args.roles,
+                                 test_mode=not args.no_test_mode, cache_mode=cache_mode_from_args(args), resume=args.resume,
+                                 log_mode=args.log_mode, context_budget=args.context_budget,
+                                 process=args.process, bounded_memory=args.bounded_memory)
+
+    os.makedirs('output', exist_ok=True)
+    summary_path = os.path.join('output', 'batch_summary.json')
+    with open(summary_path, 'w') as f:
+        json.dump({"summary": summary, "brands": records}, f, indent=2)
+
+    print(f"\n📊 {summary['succeeded']}/{summary['brands']} succeeded in {summary['wall_seconds']}s "
+          f"({summary['brands_per_hour']} brands/hour, mean {summary['mean_brand_seconds']}s per brand)")
+    print(f"Summary written to {summary_path}")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# Localizer lookup benchmark: builds the index over small_business_localizer.json
+# padded with synthetic business types and times brand resolution.
+#
+#   python benchmarks/bench_localizer.py --entries 100 1000 5000
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+QUERIES = {
+    "brand.json": None,
+    "exact": {"name": "Maple Street Florist", "key_traits": ["Seasonal bouquets"]},
+    "token": {"name": "Paws & Suds", "key_traits": ["Pet grooming and nail trims"]},
+    "fuzzy": {"name": "Main St Barber", "notes": "A psycologist-recommended quiet space"},
+    "no match": {"name": "Orbit Labs", "notes": "Satellite telemetry consultancy"},
+}
+
+
+def synthetic_entries(count, seed=7):
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    word = lambda: "".join(rng.choice(letters) for _ in range(rng.randint(5, 10)))
+    return [{"business_type": f"{word()} {word()}", "scene_constraints": {"avoid": [], "include": []}}
+            for _ in range(count)]
+
+
+def main(argv=None):
+    from tools.localizer_index import LocalizerIndex
+
+    parser = argparse.ArgumentParser(description="Time business-type resolution against index size.")
+    parser.add_argument("--entries", type=int, nargs="+", default=[0, 1000, 5000], help="Synthetic entries added to the real file")
+    parser.add_argument("--repeat", type=int, default=500, help="Lookups timed per query")
+    args = parser.parse_args(argv)
+
+    with open(os.path.join(REPO_ROOT, "small_business_localizer.json")) as f:
+        real = json.load(f)
+    with open(os.path.join(REPO_ROOT, "input", "brand.json")) as f:
+        QUERIES["brand.json"] = json.load(f)
+
+    print(f"{'Entries':>8}{'Build ms':>10}  " + "".join(f"{name + ' µs':>14}" for name in QUERIES))
+    for extra in args.entries:
+        started = time.perf_counter()
+        index = LocalizerIndex(real + synthetic_entries(extra))
+        build_ms = (time.perf_counter() - started) * 1000
+        timings = []
+        for brand in QUERIES.values():
+            index.resolve(brand)  # warm the fuzzy-word cache, as repeated runs in one process would
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                index.resolve(brand)
+            timings.append((time.perf_counter() - started) / args.repeat * 1_000_000)
+        print(f"{len(index):>8}{build_ms:>10.1f}  " + "".join(f"{value:>14.1f}" for value in timings))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+# Offline pipeline benchmark: runs the real crew_setup/get_tasks pipeline against
+# a stub LLM and local fake search/image servers, so only our own overhead
+# (prompt construction, tool dispatch, file I/O, logging) is measured.
+#
+#   python benchmarks/bench_pipeline.py --brands 3 --scales solo small midsize large
+#   python benchmarks/bench_pipeline.py --llm-latency 0.2 --process parallel   # vs. --process sequential
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+SCALES = ["solo", "small", "midsize", "large"]
+
+
+def sample_brand(index: int, scale: str) -> dict:
+    return {
+        "name": f"Bench {scale.title()} Brand {index}",
+        "launch_year": 2000 + index,
+        "origin": "Benchmark fixture, Springfield",
+        "key_traits": ["Family owned", "Neighborhood favorite", "Fast turnaround"],
+        "slogans": ["Always local"],
+        "urls": ["https://example.com"],
+        "notes": "Synthetic brand used by the offline benchmark.",
+        "scale": scale,
+    }
+
+
+def run_benchmark(brands_per_scale, scales, llm_latency=0.0, http_latency=0.0, cache_mode="off", process="sequential"):
+    from benchmarks.fakes import FakeServices, StubLLM, stub_script
+
+    workdir = tempfile.mkdtemp(prefix="crew_bench_")
+    previous_cwd = os.getcwd()
+    os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+    os.environ.setdefault("SERPER_API_KEY", "bench")
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    os.environ["MOOD_BOARD_CACHE_DIR"] = os.path.join(workdir, ".cache", "images")
+    os.environ["RESPONSE_CACHE_PATH"] = os.path.join(workdir, ".cache", "responses.sqlite")
+
+    results = []
+    with FakeServices(latency=http_latency) as services:
+        os.environ["SERPER_BASE_URL"] = services.base_url
+        os.chdir(workdir)
+        try:
+            import_started = time.perf_counter()
+            import crew_setup
+            import_seconds = time.perf_counter() - import_started
+
+            build_started = time.perf_counter()
+            agents = crew_setup.load_roles(os.path.join(REPO_ROOT, "roles.json"), cache_mode=cache_mode)
+            build_seconds = time.perf_counter() - build_started
+
+            stubs = {}
+            for agent in agents:
+                traced = agent.llm.inner if cache_mode != "off" else agent.llm
+                traced.inner = stubs[agent.role] = StubLLM(model="gpt-4o-mini", latency=llm_latency,
+                                                           answer=f"{agent.role} stub answer.")
+
+            for scale in scales:
+                for index in range(brands_per_scale):
+                    brand = sample_brand(index, scale)
+                    slug = crew_setup.slugify(brand["name"])
+                    for role, stub in stubs.items():
+                        stub.script = stub_script(role, slug, services.image_urls())
+                    started = time.perf_counter()
+                    # The crew's verbose output still goes to each brand's crew_log.txt
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        run = crew_setup.run_brand(brand, agents=agents, brand_slug=slug, cache_mode=cache_mode,
+                                                   process=process)
+                    seconds = time.perf_counter() - started
+                    with open(os.path.join(run["output_dir"], "run_report.json")) as f:
+                        report = json.load(f)
+                    results.append({"scale": scale, "slug": slug, "status": run["status"], "seconds": seconds,
+                                    "report": report})
+        finally:
+            os.chdir(previous_cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "import_seconds": import_seconds,
+        "build_agents_seconds": build_seconds,
+        "http_requests": services.requests,
+        "process": process,
+        "runs": results,
+    }
+
+
+def summarize(bench):
+    """
+    Per-scale end-to-end, per-stage and per-tool timings plus throughput.
+    """
+    summary = {
+        "import_seconds": round(bench["import_seconds"], 3),
+        "build_agents_seconds": round(bench["build_agents_seconds"], 3),
+        "http_requests": bench["http_requests"],
+        "process": bench["process"],
+        "scales": {},
+    }
+    for scale in dict.fromkeys(run["scale"] for run in bench["runs"]):
+        runs = [run for run in bench["runs"] if run["scale"] == scale]
+        seconds = [run["seconds"] for run in runs]
+        stages = {}
+        tools = {}
+        for run in runs:
+            for task in run["report"]["tasks"]:
+                stages.setdefault(task["task"], []).append(task["wall_seconds"] or 0.0)
+            for name, stats in run["report"]["tools"].items():
+                tools.setdefault(name, []).append(stats["mean_seconds"])
+        summary["scales"][scale] = {
+            "brands": len(runs),
+            "failed": sum(1 for run in runs if run["status"] != "SUCCESS"),
+            "mean_seconds": round(statistics.mean(seconds), 4),
+            "p95_seconds": round(sorted(seconds)[max(0, int(len(seconds) * 0.95) - 1)], 4),
+            "brands_per_second": round(len(runs) / sum(seconds), 3) if sum(seconds) else None,
+            "stages": {name: round(statistics.mean(values), 4) for name, values in stages.items()},
+            "tools": {name: round(statistics.mean(values), 4) for name, values in tools.items()},
+        }
+    return summary
+
+
+def format_summary(summary) -> str:
+    lines = [
+        f"import crew_setup (crewai preloaded): {summary['import_seconds']:.3f}s   load_roles: {summary['build_agents_seconds']:.3f}s   "
+        f"fake HTTP requests: {summary['http_requests']}   process: {summary['process']}",
+        "",
+        f"{'Scale':<10}{'Brands':>7}{'Failed':>7}{'Mean s':>9}{'p95 s':>9}{'Brands/s':>10}",
+    ]
+    for scale, row in summary["scales"].items():
+        lines.append(f"{scale:<10}{row['brands']:>7}{row['failed']:>7}{row['mean_seconds']:>9.3f}"
+                     f"{row['p95_seconds']:>9.3f}{row['brands_per_second'] or 0:>10.2f}")
+    for scale, row in summary["scales"].items():
+        lines.append("")
+        lines.append(f"[{scale}] per stage (mean s): " + ", ".join(f"{k}={v:.3f}" for k, v in row["stages"].items()))
+        if row["tools"]:
+            lines.append(f"[{scale}] per tool call (mean s): " + ", ".join(f"{k}={v:.3f}" for k, v in row["tools"].items()))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the crew pipeline with stubbed services.")
+    parser.add_argument("--brands", type=int, default=2, help="Brands to run per scale")
+    parser.add_argument("--scales", nargs="+", default=SCALES, choices=SCALES, help="Business scales to benchmark")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated seconds per stub LLM call")
+    parser.add_argument("--http-latency", type=float, default=0.0, help="Simulated seconds per fake HTTP request")
+    parser.add_argument("--cache", choices=["off", "use", "refresh"], default="off", help="Response cache mode")
+    parser.add_argument("--process", choices=["sequential", "parallel"], default="sequential",
+                        help="Crew process to compare; use with --llm-latency to see the concurrency gain")
+    parser.add_argument("--json", help="Also write the summary as JSON to this path")
+    args = parser.parse_args(argv)
+
+    bench = run_benchmark(args.brands, args.scales, llm_latency=args.llm_latency,
+                          http_latency=args.http_latency, cache_mode=args.cache, process=args.process)
+    summary = summarize(bench)
+    print(format_summary(summary))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 0 if all(row["failed"] == 0 for row in summary["scales"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
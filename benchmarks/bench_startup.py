@@ -0,0 +1,62 @@
+# Cold-start benchmark: times fresh interpreter runs of the short commands
+# (import, --help, --validate, --dry-run) against building the agents, which is
+# the first point that has to import crewai.
+#
+#   python benchmarks/bench_startup.py --repeat 5
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    "python (baseline)": [sys.executable, "-c", "pass"],
+    "import crew_setup": [sys.executable, "-c", "import crew_setup"],
+    "crew_setup.py --help": [sys.executable, "crew_setup.py", "--help"],
+    "crew_setup.py --validate": [sys.executable, "crew_setup.py", "--validate"],
+    "crew_setup.py --dry-run": [sys.executable, "crew_setup.py", "--dry-run"],
+    "load_roles (imports crewai)": [sys.executable, "-c",
+                                    "import crew_setup; crew_setup.load_roles('roles.json', cache_mode='off')"],
+}
+
+
+def time_command(command, repeat):
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "sk-bench"),
+               SERPER_API_KEY=os.environ.get("SERPER_API_KEY", "bench"), CREWAI_DISABLE_TELEMETRY="true",
+               OTEL_SDK_DISABLED="true")
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        completed = subprocess.run(command, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        samples.append(time.perf_counter() - started)
+        if completed.returncode != 0:
+            return {"error": completed.stderr.decode(errors="replace").strip().splitlines()[-1:]}
+    return {"mean_seconds": round(statistics.mean(samples), 4), "min_seconds": round(min(samples), 4)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the crew CLI commands.")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreter runs per command")
+    parser.add_argument("--json", help="Also write the results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    results = {name: time_command(command, args.repeat) for name, command in COMMANDS.items()}
+    print(f"{'Command':<32}{'Mean s':>9}{'Min s':>9}")
+    for name, row in results.items():
+        if "error" in row:
+            print(f"{name:<32}  failed: {' '.join(row['error'])}")
+        else:
+            print(f"{name:<32}{row['mean_seconds']:>9.3f}{row['min_seconds']:>9.3f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0 if all("error" not in row for row in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+# Deterministic stand-ins for the external services the crew talks to:
+# a scripted stub LLM, a fake SerperDev endpoint and a local image server.
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import struct
+import threading
+import zlib
+
+from crewai.llms.base_llm import BaseLLM
+
+SEARCH_TOOL = "Search the internet with Serper"
+FILE_TOOL = "File Writer Tool"
+IMAGE_TOOL = "MoodBoardImageTool"
+AD_PROMPT_TOOL = "AdPromptTool"
+
+
+def make_png(width: int, height: int, rgb) -> bytes:
+    """
+    Build a solid-colour PNG without needing Pillow.
+    """
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    row = b"\x00" + bytes(rgb) * width
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(row * height))
+        + chunk(b"IEND", b"")
+    )
+
+
+class FakeServices:
+    """
+    Serves /search (SerperDev-shaped JSON) and /img/<n>.png on one local port.
+    Images carry an ETag so the image cache's revalidation path is exercised.
+    """
+
+    def __init__(self, image_count: int = 8, latency: float = 0.0):
+        self.images = {
+            f"/img/{i}.png": make_png(64, 64, ((37 * i) % 256, (91 * i) % 256, (53 * i) % 256))
+            for i in range(image_count)
+        }
+        self.latency = latency
+        self.requests = 0
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b"", content_type="application/json", headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                services._hit()
+                length = int(self.headers.get("Content-Length", 0))
+                query = json.loads(self.rfile.read(length) or b"{}").get("q", "")
+                organic = [
+                    {"title": f"{query} result {i}", "link": f"{services.base_url}/img/{i}.png",
+                     "snippet": f"Image {i} for {query}", "position": i + 1}
+                    for i in range(len(services.images))
+                ]
+                self._send(200, json.dumps({"searchParameters": {"q": query}, "organic": organic}).encode())
+
+            def do_GET(self):
+                services._hit()
+                body = services.images.get(self.path)
+                if body is None:
+                    self._send(404, b"not found", "text/plain")
+                    return
+                etag = f'"{zlib.crc32(body):08x}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, headers={"ETag": etag})
+                    return
+                self._send(200, body, "image/png", {"ETag": etag})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _hit(self):
+        self.requests += 1
+        if self.latency:
+            threading.Event().wait(self.latency)
+
+    def image_urls(self):
+        return [f"{self.base_url}{path}" for path in self.images]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StubLLM(BaseLLM):
+    """
+    Scripted ReAct model: on each call it emits the next tool action from its
+    script (one per assistant turn already in the conversation), then a final
+    answer. Output only depends on the conversation, so runs are repeatable.
+    """
+
+    script: list = []
+    answer: str = "Stub answer."
+    latency: float = 0.0
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        if self.latency:
+            threading.Event().wait(self.latency)
+        # Each earlier action shows up as one assistant turn in the conversation
+        step = 0 if isinstance(messages, str) else sum(1 for m in messages if m.get("role") == "assistant")
+        if step < len(self.script):
+            tool_name, tool_input = self.script[step]
+            return (
+                f"Thought: I should use {tool_name}.\n"
+                f"Action: {tool_name}\n"
+                f"Action Input: {json.dumps(tool_input)}"
+            )
+        return f"Thought: I now know the final answer\nFinal Answer: {self.answer}"
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return True
+
+    def get_context_window_size(self) -> int:
+        return 128000
+
+
+def stub_script(role: str, brand_slug: str, image_urls):
+    """
+    The tool calls each role makes in the benchmark, mirroring a typical real run.
+    """
+    out = f"output/{brand_slug}"
+    write = lambda name, content: (FILE_TOOL, {"filename": name, "directory": out, "content": content, "overwrite": True})
+    if role == "Brand Analyst":
+        return [
+            (SEARCH_TOOL, {"search_query": f"{brand_slug} brand logo"}),
+            (IMAGE_TOOL, {"save_path": f"{out}/mood_board/", "image_urls": image_urls}),
+            write("brand_analyst_test_output.txt", "Tone: warm. Style: grounded."),
+        ]
+    if role == "Prompt Architect":
+        scene = {
+            "model": "google_veo_v3",
+            "scene": {
+                "title": "Morning open", "duration_seconds": 8, "fps": 30, "aspect_ratio": "9:16",
+                "style": {"render": "photoreal", "lighting": "soft", "camera_equipment": "35mm"},
+                "character": {"name": "staff", "appearance": "apron", "emotional_journey": "calm to proud"},
+                "environment": {"location": "shopfront", "props": ["sign"], "atmospherics": "dawn"},
+                "script": [{"type": "stage_direction", "character": "staff", "movement": "unlocks door"}],
+            },
+        }
+        return [(AD_PROMPT_TOOL, {"prompt": scene}),
+                (AD_PROMPT_TOOL, {"finalize": True})]
+    if role in ("Vignette Designer", "Visual Stylist", "Business Creative Synthesizer"):
+        return [(SEARCH_TOOL, {"search_query": f"{brand_slug} {role} references"}),
+                write(f"{role.lower().replace(' ', '_')}_bench.txt", f"{role} notes")]
+    return [write(f"{role.lower().replace(' ', '_')}_bench.txt", f"{role} notes")]
@@ -1,10 +1,22 @@
-from crewai import Agent, Task, Crew
-from crewai_tools import FileWriterTool
+# crewai and crewai_tools are slow to import, so they are only imported where an
+# agent or crew is actually built; --help, --validate and --dry-run stay fast.
 from dotenv import load_dotenv
 from tools.logger import CrewLogger
 
-from tools.logger import TeeLogger
+from tools.logger import LOG_FULL, LOG_MODES, TeeLogger
+from tools.checkpoints import CheckpointStore
+from tools.image_normalizer import get_normalization_stage
+from tools.memory import OutputSpill, RssMonitor
+from tools.instrumentation import RunTracer, estimate_tokens, set_active_tracer
+from tools.prompt_budget import DEFAULT_CONTEXT_BUDGET, ContextBudget
+from tools.task_graph import PROCESS_MODES, PROCESS_SEQUENTIAL, apply_dependency_graph, execution_waves
+from tools.resilience import resilience_stats, stats_since
+from tools.registry import load_role_specs, tools_for_role, validate_role_specs
+from tools.response_cache import CACHE_OFF, CACHE_REFRESH, CACHE_USE, get_response_cache
 from datetime import datetime
+from types import SimpleNamespace
+import argparse
+import gc
 import os
 import sys
 import re
@@ -16,74 +28,62 @@ def slugify(text):
     text = re.sub(r'_+', '_', text)
     return text.strip('_')
 
-# Load brand name for output folder
-try:
-    with open('input/brand.json') as f:
-        brand_data = json.load(f)
-        brand_name = brand_data.get('name', 'unknown_brand')
-except Exception:
-    brand_name = 'unknown_brand'
-brand_slug = slugify(brand_name)
-output_dir = os.path.join('output', brand_slug)
-os.makedirs(output_dir, exist_ok=True)
-
-# Update log path and logger to use brand folder
-log_path = os.path.join(output_dir, 'crew_log.txt')
-sys.stdout = TeeLogger(log_path)
-
-# Clear the log at the start of each run
-with open(log_path, 'w') as f:
-    f.write(f"🕓 Run started: {datetime.now()}\n{'='*60}\n")
-
-load_dotenv()
+def load_brand(path='input/brand.json'):
+    """
+    Load brand data from a JSON file. Falls back to an empty dict so the
+    output folder becomes 'unknown_brand' instead of crashing the run.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except Exception:
+        return {}
 
-logger = CrewLogger()
-# 🔧 Tool Setup
-write_tool = FileWriterTool()
 
+def load_roles(json_path, cache_mode=CACHE_USE):
+    """
+    Build one Agent per role. Tools come from the shared registry (one instance
+    per process). Every LLM and tool call is traced for the run report; unless
+    cache_mode is 'off', each agent's LLM and its side-effect free tools are
+    also wrapped in the persistent response cache.
+    """
+    from crewai import Agent
+    from crewai.utilities.llm_utils import create_llm
+    from tools.proxies import CachedLLM, TracedLLM
 
-def load_roles(json_path):
-    with open(json_path) as f:
-        roles = json.load(f)
+    cache = get_response_cache(cache_mode) if cache_mode != CACHE_OFF else None
     agents = []
-    for role in roles:
-        tools = []
-        if "WebSearchTool" in role.get("tools", []):
-            from crewai_tools import SerperDevTool
-            tools.append(SerperDevTool())
-        if "FileWriterTool" in role.get("tools", []):
-            from crewai_tools import FileWriterTool
-            tools.append(FileWriterTool())
-        if "MoodBoardImageTool" in role.get("tools", []):
-            from tools.image_downloader import MoodBoardImageTool
-            tools.append(MoodBoardImageTool())
+    for role in load_role_specs(json_path):
+        llm = TracedLLM(create_llm(role.get("llm")), role=role["role"])
+        if cache is not None:
+            llm = CachedLLM(llm, cache=cache)
         agents.append(Agent(
             role=role["role"],
             goal=role["goal"],
             backstory=role["backstory"],
-            tools=tools,
+            tools=tools_for_role(role["role"], role.get("tools", []), cache=cache),
+            llm=llm,
             verbose=role.get("verbose", True),
             allow_delegation=role.get("allow_delegation", False)
         ))
     return agents
 
-agents = load_roles('roles.json')
-agent_lookup = {agent.role: agent for agent in agents}
-
-from tasks import get_tasks
 # To enable agent test mode, set test_mode=True below
 TEST_MODE = True  # Set to True to enable agent test output files
-tasks = get_tasks(agent_lookup, test_mode=TEST_MODE, brand_slug=brand_slug)
 
 MAX_ITERATIONS = 50  # Set a reasonable upper bound for agent actions/steps
 
-def safe_kickoff(crew):
+def safe_kickoff(crew, output_dir, logger):
+    """
+    Run the crew and record SUCCESS/FAILURE in crew_status.txt.
+    Returns (succeeded, result).
+    """
     try:
         result = crew.kickoff()
         with open(os.path.join(output_dir, "crew_status.txt"), "w") as f:
             f.write(f"SUCCESS\n{str(result)}\n")
         print("\n✅ Workflow completed successfully.")
-        return result
+        return True, result
     except Exception as e:
         logger.log(f"❌ Error during crew execution: {e}")
         # Notify all agents (if context is supported)
@@ -93,16 +93,274 @@ def safe_kickoff(crew):
         with open(os.path.join(output_dir, "crew_status.txt"), "w") as f:
             f.write(f"FAILURE\n{e}\n")
         print(f"\n❌ Workflow failed: {e}")
-        return f"Workflow terminated due to error. See logs for details."
+        return False, f"Workflow terminated due to error. See logs for details."
+
+def run_brand(brand_data, agents=None, test_mode=TEST_MODE, brand_slug=None, logger=None, cache_mode=CACHE_USE,
+              resume=False, log_mode=LOG_FULL, context_budget=DEFAULT_CONTEXT_BUDGET, process=PROCESS_SEQUENTIAL,
+              bounded_memory=False):
+    """
+    Run the full crew pipeline for a single brand.
+
+    `agents` may be a list built earlier by load_roles so that callers running
+    many brands (see batch_runner.py) don't rebuild them per brand.
+    Every completed task is checkpointed under output/<slug>/checkpoints/; with
+    `resume=True` tasks with a valid checkpoint are skipped and their stored
+    output is passed downstream as context.
+    `log_mode` picks what goes into crew_log.txt (see tools/logger.py); the
+    console always gets the full verbose stream.
+    `context_budget` caps each task's prompt (instructions plus upstream
+    outputs, in estimated tokens); larger upstream outputs are compacted into
+    summaries before being passed on, least relevant first. 0 (the default)
+    only measures.
+    `process` is 'sequential' (every task in turn, each seeing all earlier
+    outputs) or 'parallel' (tasks only see their TASK_DEPENDENCIES and
+    independent ones run concurrently; see tools/task_graph.py).
+    `bounded_memory` keeps only a short summary of each finished task in
+    memory (the full text stays in its checkpoint) for long-lived workers;
+    see tools/memory.py. Peak RSS for the run is always reported.
+    Returns a dict with the brand slug, output dir, status and result text.
+    """
+    from crewai import Crew
+    from tasks import TASK_DEPENDENCIES, get_tasks
+    from tools.ad_prompts import AdPromptWriter, set_active_directory
+
+    brand_slug = brand_slug or slugify(brand_data.get('name', 'unknown_brand'))
+    output_dir = os.path.join('output', brand_slug)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Clear the log at the start of each run
+    log_path = os.path.join(output_dir, 'crew_log.txt')
+    with open(log_path, 'w') as f:
+        f.write(f"🕓 Run started: {datetime.now()}\n{'='*60}\n")
+
+    # Mirror stdout into the brand's log for the duration of this run only
+    tee = TeeLogger(log_path, file_mode=log_mode)
+    sys.stdout = tee
+    owns_logger = logger is None
+    tracer = RunTracer(output_dir)
+    set_active_tracer(tracer)
+    set_active_directory(output_dir)
+    cache = get_response_cache(cache_mode) if cache_mode != CACHE_OFF else None
+    cache_hits, cache_misses = (cache.hits, cache.misses) if cache else (0, 0)
+    api_stats = resilience_stats()
+    memory = RssMonitor().start_monitoring()
+    try:
+        logger = logger or CrewLogger(os.path.join(output_dir, 'crew_summary_log.txt'))
+        if agents is None:
+            agents = load_roles('roles.json', cache_mode=cache_mode)
+        agent_lookup = {agent.role: agent for agent in agents}
+        tasks = get_tasks(agent_lookup, test_mode=test_mode, brand_slug=brand_slug, brand_data=brand_data)
+        if process != PROCESS_SEQUENTIAL:
+            tasks = apply_dependency_graph(tasks, TASK_DEPENDENCIES)
+
+        checkpoints = CheckpointStore(output_dir)
+        restored = []
+        if resume:
+            restored, tasks = checkpoints.resume(tasks)
+            if restored:
+                print(f"⏩ Resuming: reusing checkpoints for {', '.join(task.name for task in restored)}")
+        else:
+            checkpoints.clear()
+        all_tasks = restored + tasks
+        # Attached before the checkpoints so those still store the full, uncompacted output
+        budget = ContextBudget(context_budget, TASK_DEPENDENCIES)
+        budget.attach(all_tasks)
+        spill = None
+        if bounded_memory:
+            spill = OutputSpill(checkpoints.dir)
+            spill.attach(all_tasks)
+            for task in restored[:len(all_tasks) - 1]:
+                spill.spill(task, task.output)
+        if restored:
+            budget.apply_ready()
+        checkpoints.attach(tasks)
+        ad_prompts = AdPromptWriter(output_dir)
+        if any(task.name == "prompt_architect" for task in tasks):
+            ad_prompts.reset()
+
+        if tasks:
+            # 🚀 Launch!
+            crew = Crew(agents=agents, tasks=tasks, verbose=True)
+            succeeded, result = safe_kickoff(crew, output_dir, logger)
+        else:
+            print("\n✅ All tasks already completed; nothing to resume.")
+            succeeded, result = True, restored[-1].output.raw
+        # The Prompt Architect streams prompts to ad_prompts.jsonl; assemble them if it never finalized
+        if os.path.exists(ad_prompts.stream_path) and not os.path.exists(ad_prompts.final_path):
+            try:
+                assembled = ad_prompts.assemble()
+            except ValueError as e:  # a corrupt line in the stream
+                assembled = {"ok": False, "errors": [{"path": "", "error": f"unreadable {ad_prompts.stream_path}: {e}"}]}
+            if assembled.get("ok"):
+                print(f"\n🧩 Assembled {assembled['prompts']} streamed prompt(s) into {ad_prompts.final_path}")
+            else:
+                reason = "; ".join(error["error"] for error in assembled.get("errors", []))
+                print(f"\n⚠️ Could not assemble {ad_prompts.final_path} ({reason}); the final text output is the fallback")
+                logger.log(f"⚠️ Could not assemble {ad_prompts.final_path}: {reason}")
+
+        # Mood board normalization runs in the background; let it finish before reporting
+        image_stats = None
+        stage = get_normalization_stage()
+        if stage is not None:
+            stage.wait()
+            image_stats = stage.board_summary(os.path.join(output_dir, "mood_board")) or None
+            if image_stats:
+                print(f"\n🖼️ Mood board images: {', '.join(f'{count} {status}' for status, count in image_stats.items())}")
+
+        cache_stats = None
+        if cache is not None:
+            cache_stats = {"mode": cache_mode, "hits": cache.hits - cache_hits, "misses": cache.misses - cache_misses}
+            print(f"\n♻️ Response cache ({cache_mode}): {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+        report_table = tracer.write_report(all_tasks, extra={
+            "brand": brand_data.get('name', 'unknown_brand'),
+            "status": "SUCCESS" if succeeded else "FAILURE",
+            "process": process,
+            "resumed_tasks": [task.name for task in restored],
+            "response_cache": cache_stats,
+            "prompt_budget": budget.report(),
+            "external_apis": stats_since(api_stats),
+            "mood_board_images": image_stats,
+            "memory": {**memory.report(), "bounded": bounded_memory, "spilled_tasks": spill.spilled if spill else []},
+        })
+        print(f"\n📊 Run report ({output_dir}/run_report.json):\n{report_table}")
+        print(f"\n🧾 Final Output:\n{result}")
+        logger.log("\n🧾 Final Output:\n" + str(result))
+        result = str(result)  # drop the CrewOutput and the task outputs it references
+    finally:
+        memory.stop()
+        set_active_tracer(None)
+        set_active_directory(None)
+        if owns_logger and logger is not None:
+            logger.close()
+        sys.stdout = tee.terminal
+        tee.close()
+    if bounded_memory:
+        gc.collect()
+
+    return {
+        "brand": brand_data.get('name', 'unknown_brand'),
+        "slug": brand_slug,
+        "output_dir": output_dir,
+        "status": "SUCCESS" if succeeded else "FAILURE",
+        "result": result,
+        "peak_rss_mb": memory.report()["peak_rss_mb"],
+    }
+
+def plan_tasks(brand_data, roles, test_mode=TEST_MODE, brand_slug=None):
+    """
+    The task plan as plain dicts, built without importing crewai.
+    Raises KeyError if a task's agent is missing from the role definitions.
+    """
+    from tasks import get_tasks
+
+    brand_slug = brand_slug or slugify(brand_data.get('name', 'unknown_brand'))
+    # Stand-ins carrying just what get_tasks reads from an agent
+    lookup = {
+        role["role"]: SimpleNamespace(role=role["role"], allow_delegation=role.get("allow_delegation", False))
+        for role in roles if isinstance(role, dict) and "role" in role
+    }
+    return get_tasks(lookup, test_mode=test_mode, brand_slug=brand_slug, brand_data=brand_data, task_factory=dict)
+
+def validate_setup(brand_path='input/brand.json', roles_path='roles.json'):
+    """
+    Check the brand file, the role definitions and that every task's agent
+    exists. Prints what it finds and returns True when everything is valid.
+    """
+    from tasks import health_check_brand_json
+
+    brand_ok = health_check_brand_json(brand_path)
+    try:
+        roles = load_role_specs(roles_path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not load {roles_path}: {e}")
+        return False
+    problems = validate_role_specs(roles)
+    if not problems:
+        try:
+            plan_tasks(load_brand(brand_path), roles)
+        except KeyError as e:
+            problems.append(f"task agent {e} is not defined in {roles_path}")
+    for problem in problems:
+        print(f"❌ {problem}")
+    if brand_ok and not problems:
+        print(f"✅ {brand_path} and {roles_path} look valid.")
+    return brand_ok and not problems
+
+def print_dry_run(brand_data, roles_path='roles.json', test_mode=TEST_MODE, cache_mode=CACHE_USE,
+                  process=PROCESS_SEQUENTIAL):
+    """
+    Print the tasks a run would execute, with their agents, tools and rough prompt size.
+    """
+    roles = {role["role"]: role for role in load_role_specs(roles_path)}
+    brand_slug = slugify(brand_data.get('name', 'unknown_brand'))
+    tasks = plan_tasks(brand_data, list(roles.values()), test_mode=test_mode, brand_slug=brand_slug)
+    print(f"\n🧪 Dry run: {brand_data.get('name', 'unknown_brand')} -> output/{brand_slug} "
+          f"(test mode: {test_mode}, cache: {cache_mode}, process: {process})")
+    for index, task in enumerate(tasks, start=1):
+        role = task["agent"].role
+        tools = ", ".join(roles[role].get("tools", [])) or "-"
+        print(f"  {index}. {task['name']:<26}{role:<31}~{estimate_tokens(task['description']):>5} prompt tokens   tools: {tools}")
+    if process != PROCESS_SEQUENTIAL:
+        from tasks import TASK_DEPENDENCIES
+        for index, wave in enumerate(execution_waves(tasks, TASK_DEPENDENCIES), start=1):
+            print(f"  ⏱  wave {index}: {' + '.join(task['name'] for task in wave)}")
+    if any(task["name"] == "smallbusiness_localizer" for task in tasks):
+        from tools.localizer_index import get_localizer_index
+        match = get_localizer_index().resolve(brand_data)
+        print(f"  📍 Localizer template: {match['business_type']} ({match['method']} match)" if match
+              else "  📍 Localizer template: none matched")
+
+def add_cache_arguments(parser):
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--no-cache", action="store_true", help="Bypass the LLM/tool response cache entirely")
+    group.add_argument("--refresh-cache", action="store_true", help="Ignore cached responses and overwrite them with fresh ones")
+
+def cache_mode_from_args(args):
+    if args.no_cache:
+        return CACHE_OFF
+    if args.refresh_cache:
+        return CACHE_REFRESH
+    return CACHE_USE
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the creative crew for a single brand.")
+    parser.add_argument("--brand", default="input/brand.json", help="Path to the brand JSON file")
+    parser.add_argument("--roles", default="roles.json", help="Path to the role definitions")
+    parser.add_argument("--validate", action="store_true", help="Check the brand and role files, then exit")
+    parser.add_argument("--dry-run", action="store_true", help="Validate and print the task plan without running any agent")
+    parser.add_argument("--resume", action="store_true", help="Skip tasks that already have a checkpoint from a previous run")
+    parser.add_argument("--bounded-memory", action="store_true",
+                        help="Keep only summaries of finished task outputs in memory (full text stays in the checkpoints)")
+    parser.add_argument("--normalize-images", action="store_true",
+                        help="Verify mood board images and write resized derivatives, thumbnails and a manifest (needs Pillow)")
+    parser.add_argument("--context-budget", type=int, default=DEFAULT_CONTEXT_BUDGET,
+                        help="Token budget per task prompt, e.g. 6000; upstream outputs over it are summarized, "
+                             "least relevant first (0 = only measure, the default)")
+    parser.add_argument("--process", choices=PROCESS_MODES, default=PROCESS_SEQUENTIAL,
+                        help="Run tasks one after another, or run independent tasks concurrently")
+    parser.add_argument("--log-mode", choices=LOG_MODES, default=LOG_FULL,
+                        help="What to keep in crew_log.txt: everything, quiet (no verbose panels) or structured JSON lines")
+    add_cache_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.normalize_images:
+        os.environ["MOOD_BOARD_NORMALIZE"] = "1"
+
+    if args.validate or args.dry_run:
+        valid = validate_setup(args.brand, args.roles)
+        if valid and args.dry_run:
+            print_dry_run(load_brand(args.brand), args.roles, cache_mode=cache_mode_from_args(args), process=args.process)
+        return 0 if valid else 1
+
+    from tasks import health_check_brand_json
 
-# 🚀 Launch!
-crew = Crew(agents=agents, tasks=tasks, verbose=True)
-result = safe_kickoff(crew)
-print(f"\n🧾 Final Output:\n{result}")
+    load_dotenv()
+    health_check_brand_json(args.brand)
+    cache_mode = cache_mode_from_args(args)
+    run = run_brand(load_brand(args.brand), agents=load_roles(args.roles, cache_mode=cache_mode), cache_mode=cache_mode,
+                    resume=args.resume, log_mode=args.log_mode, context_budget=args.context_budget, process=args.process,
+                    bounded_memory=args.bounded_memory)
 
-# Optional: reset stdout if needed
-# sys.stdout = sys.__stdout__
-logger.log("\n🧾 Final Output:\n" + str(result))
-print("\n🧾 Final Output:\n")
-print(result)
+    return 0 if run["status"] == "SUCCESS" else 1
 
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+# Job server: accept brand JSON over HTTP and run it on a pool of warm workers
+#
+#   python job_server.py --workers 4 --max-pending 200
+#   curl -X POST --data @input/brand.json localhost:8765/jobs
+#   curl localhost:8765/jobs/<id>
+#   curl -O localhost:8765/jobs/<id>/artifacts/ad_prompts.json
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+import argparse
+import json
+import mimetypes
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import uuid
+import zipfile
+
+from tools.task_graph import PROCESS_MODES, PROCESS_SEQUENTIAL
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+MAX_BODY_BYTES = 1024 * 1024
+JOB_HISTORY = 1000  # finished jobs kept in memory for status queries
+RETRY_AFTER_SECONDS = 30
+JOB_OPTIONS = ("test_mode", "process", "context_budget")  # per-job overrides of the worker run options
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+def brand_field_error(brand_data):
+    """
+    Why the brand's fields can't be used to plan tasks, or None if they can.
+    """
+    if not isinstance(brand_data.get("name", ""), str):
+        return "name must be a string"
+    for field in ("scale", "business_type"):
+        if brand_data.get(field) is not None and not isinstance(brand_data[field], str):
+            return f"{field} must be a string"
+    for field in ("key_traits", "slogans", "urls"):
+        value = brand_data.get(field, [])
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            return f"{field} must be a list of strings"
+    return None
+
+
+class JobService:
+    """
+    Queues brand jobs for a process pool whose workers build their agents once
+    (batch_runner._init_worker) and then run brand after brand. At most
+    `max_pending` jobs may be queued or running; beyond that submit raises
+    JobQueueFull so callers can back off. Progress is read from each job's
+    checkpoints, which run_brand writes as every stage completes.
+    """
+
+    def __init__(self, workers=2, max_pending=100, roles_path='roles.json', run_options=None):
+        from tools.registry import load_role_specs
+
+        self.workers = workers
+        self.max_pending = max_pending
+        self.roles_path = roles_path
+        self.roles = load_role_specs(roles_path)
+        self.run_options = run_options or {}
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self.pool = self._new_pool()
+
+    def _new_pool(self):
+        from batch_runner import _init_worker
+
+        # spawn: workers start lazily from request-handler threads, which fork does not mix well with
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=(self.roles_path, self.run_options, self.workers),
+                                   mp_context=multiprocessing.get_context("spawn"))
+
+    def _pending(self):
+        return sum(1 for job in self.jobs.values() if job["status"] in (JOB_QUEUED, JOB_RUNNING))
+
+    def submit(self, brand_data, options=None):
+        """
+        Queue one brand. Raises JobQueueFull when at capacity, ValueError on bad input.
+        """
+        from batch_runner import _run_one
+        from crew_setup import plan_tasks, slugify
+
+        if not isinstance(brand_data, dict):
+            raise ValueError("brand must be a JSON object")
+        field_error = brand_field_error(brand_data)
+        if field_error:
+            raise ValueError(field_error)
+        options = options or {}
+        unknown = sorted(set(options) - set(JOB_OPTIONS))
+        if unknown:
+            raise ValueError(f"unknown option(s) {', '.join(unknown)}; allowed: {', '.join(JOB_OPTIONS)}")
+        if not isinstance(options.get("test_mode", False), bool):
+            raise ValueError("test_mode must be true or false")
+        if options.get("process", PROCESS_SEQUENTIAL) not in PROCESS_MODES:
+            raise ValueError(f"process must be one of {', '.join(PROCESS_MODES)}")
+        budget = options.get("context_budget", 0)
+        if isinstance(budget, bool) or not isinstance(budget, int) or budget < 0:
+            raise ValueError("context_budget must be a non-negative integer")
+        job_id = uuid.uuid4().hex[:12]
+        # A job id suffix keeps concurrent jobs for the same brand in separate folders
+        slug = f"{slugify(brand_data.get('name', 'unknown_brand')) or 'unknown_brand'}_{job_id[:8]}"
+        test_mode = options.get("test_mode", self.run_options.get("test_mode", True))
+        try:
+            stages = [task["name"] for task in plan_tasks(brand_data, self.roles, test_mode=test_mode, brand_slug=slug)]
+        except KeyError as e:
+            raise ValueError(f"task agent {e} is not defined in the roles") from None
+        except (TypeError, AttributeError) as e:
+            raise ValueError(f"brand could not be planned: {e}") from None
+
+        with self._lock:
+            if self._pending() >= self.max_pending:
+                raise JobQueueFull(f"{self.max_pending} jobs already queued or running")
+            job = {
+                "id": job_id,
+                "brand": brand_data.get('name', 'unknown_brand'),
+                "slug": slug,
+                "output_dir": os.path.join('output', slug),
+                "status": JOB_QUEUED,
+                "options": options,
+                "stages": stages,
+                "submitted_at": datetime.now().isoformat(timespec='seconds'),
+                "finished_at": None,
+                "seconds": None,
+                "peak_rss_mb": None,
+                "error": None,
+            }
+            self.jobs[job_id] = job
+            self._prune()
+        try:
+            future = self.pool.submit(_run_one, f"job:{job_id}", brand_data, slug, options)
+        except BrokenProcessPool:
+            # A worker died earlier (its jobs already failed); start a fresh pool for the rest
+            with self._lock:
+                self.pool.shutdown(wait=False, cancel_futures=True)
+                self.pool = self._new_pool()
+            future = self.pool.submit(_run_one, f"job:{job_id}", brand_data, slug, options)
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return self.status(job_id)
+
+    def _finish(self, job_id, future):
+        try:
+            record = future.result()
+        except Exception as e:
+            # The worker process itself died (e.g. BrokenProcessPool)
+            record = {"status": "FAILURE", "error": f"worker crashed: {e}"}
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            job.update(
+                status=JOB_SUCCEEDED if record["status"] == "SUCCESS" else JOB_FAILED,
+                finished_at=datetime.now().isoformat(timespec='seconds'),
+                seconds=record.get("seconds"),
+                peak_rss_mb=record.get("peak_rss_mb"),
+                error=record.get("error"),
+            )
+
+    def _prune(self):
+        finished = [job for job in self.jobs.values() if job["status"] in (JOB_SUCCEEDED, JOB_FAILED)]
+        for job in sorted(finished, key=lambda job: job["finished_at"])[:max(0, len(finished) - JOB_HISTORY)]:
+            del self.jobs[job["id"]]
+
+    def status(self, job_id):
+        """
+        The job's state, per-stage progress and downloadable artifacts, or None if unknown.
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            job = dict(job)
+        output_dir = job["output_dir"]
+        # run_brand creates crew_log.txt first thing, so a queued job with one has started
+        if job["status"] == JOB_QUEUED and os.path.exists(os.path.join(output_dir, "crew_log.txt")):
+            job["status"] = JOB_RUNNING
+        checkpoint_dir = os.path.join(output_dir, "checkpoints")
+        done = {name for name in job["stages"] if os.path.exists(os.path.join(checkpoint_dir, f"{name}.json"))}
+        job["stages"] = [{"name": name, "done": name in done} for name in job["stages"]]
+        job["progress"] = f"{len(done)}/{len(job['stages'])}"
+        job["artifacts"] = self.artifacts(output_dir)
+        return job
+
+    def artifacts(self, output_dir):
+        """
+        Relative paths of the files a job has produced so far (checkpoints excluded).
+        """
+        paths = []
+        for dirpath, dirnames, filenames in os.walk(output_dir):
+            dirnames[:] = sorted(d for d in dirnames if d != "checkpoints")
+            for filename in sorted(filenames):
+                if not filename.endswith(".tmp"):
+                    paths.append(os.path.relpath(os.path.join(dirpath, filename), output_dir))
+        if os.path.isdir(os.path.join(output_dir, "mood_board")):
+            paths.append("mood_board.zip")
+        return paths
+
+    def list_jobs(self):
+        with self._lock:
+            return [{key: job[key] for key in ("id", "brand", "status", "submitted_at", "finished_at")}
+                    for job in self.jobs.values()]
+
+    def health(self):
+        with self._lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            pending = self._pending()
+        return {"workers": self.workers, "max_pending": self.max_pending, "pending": pending, "jobs": counts}
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def artifact_path(output_dir, relative):
+    """
+    Resolve a requested artifact inside a job's output folder, or None if it
+    would escape it. Symlinks are not resolved: mood boards from older runs
+    may link into the shared image cache.
+    """
+    relative = os.path.normpath(unquote(relative))
+    if os.path.isabs(relative) or relative.startswith("..") or relative.split(os.sep)[0] == "checkpoints":
+        return None
+    return os.path.join(output_dir, relative)
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=b"", content_type="application/json", headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, status, payload, headers=None):
+            self._send(status, json.dumps(payload, indent=2, default=str).encode(), headers=headers)
+
+        def _send_file(self, path, content_type=None, filename=None):
+            content_type = content_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(os.path.getsize(path)))
+            if filename:
+                self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+            self.end_headers()
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, self.wfile)
+
+        def do_POST(self):
+            if urlparse(self.path).path.rstrip("/") != "/jobs":
+                self._json(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                self._json(400, {"error": "invalid Content-Length"})
+                return
+            if length > MAX_BODY_BYTES:
+                self._json(413, {"error": f"body larger than {MAX_BODY_BYTES} bytes"})
+                return
+            try:
+                payload = json.loads(self.rfile.read(length) or b"null")
+            except ValueError as e:
+                self._json(400, {"error": f"invalid JSON: {e}"})
+                return
+            # Either the brand object itself or {"brand": {...}, "options": {...}}
+            if isinstance(payload, dict) and isinstance(payload.get("brand"), dict):
+                brand_data, options = payload["brand"], payload.get("options") or {}
+            else:
+                brand_data, options = payload, {}
+            try:
+                job = service.submit(brand_data, options)
+            except JobQueueFull as e:
+                self._json(429, {"error": str(e)}, headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+                return
+            except ValueError as e:
+                self._json(400, {"error": str(e)})
+                return
+            self._json(202, job, headers={"Location": f"/jobs/{job['id']}"})
+
+        def do_GET(self):
+            parts = [part for part in urlparse(self.path).path.split("/") if part]
+            if parts == ["health"]:
+                self._json(200, service.health())
+            elif parts == ["jobs"]:
+                self._json(200, service.list_jobs())
+            elif len(parts) >= 2 and parts[0] == "jobs":
+                job = service.status(parts[1])
+                if job is None:
+                    self._json(404, {"error": f"unknown job {parts[1]}"})
+                elif len(parts) == 2:
+                    self._json(200, job)
+                elif parts[2] == "artifacts" and len(parts) > 3:
+                    self._artifact(job, "/".join(parts[3:]))
+                else:
+                    self._json(404, {"error": "not found"})
+            else:
+                self._json(404, {"error": "not found"})
+
+        def _artifact(self, job, relative):
+            if relative == "mood_board.zip":
+                board = os.path.join(job["output_dir"], "mood_board")
+                if not os.path.isdir(board):
+                    self._json(404, {"error": "no mood board yet"})
+                    return
+                with tempfile.NamedTemporaryFile(suffix=".zip") as f:
+                    with zipfile.ZipFile(f, "w") as archive:
+                        for dirpath, _, filenames in os.walk(board):
+                            for filename in filenames:
+                                path = os.path.join(dirpath, filename)
+                                # Boards from older runs may hold symlinks whose cache blob was evicted
+                                if os.path.isfile(path) and not filename.endswith(".tmp"):
+                                    archive.write(path, os.path.relpath(path, board))
+                    f.flush()
+                    self._send_file(f.name, "application/zip", f"{job['slug']}_mood_board.zip")
+                return
+            path = artifact_path(job["output_dir"], relative)
+            if path is None or not os.path.isfile(path):
+                self._json(404, {"error": f"no artifact {relative}"})
+                return
+            self._send_file(path, filename=os.path.basename(path))
+
+    return Handler
+
+
+def main(argv=None):
+    from crew_setup import add_cache_arguments, cache_mode_from_args
+    from dotenv import load_dotenv
+    from tools.logger import LOG_MODES, LOG_QUIET
+
+    parser = argparse.ArgumentParser(description="Serve the creative crew as a local HTTP job queue.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Warm worker processes")
+    parser.add_argument("--max-pending", type=int, default=100,
+                        help="Jobs allowed to be queued or running; more get 429 Too Many Requests")
+    parser.add_argument("--roles", default="roles.json", help="Path to the roles JSON file")
+    parser.add_argument("--no-test-mode", action="store_true", help="Disable agent test output files unless a job asks for them")
+    parser.add_argument("--process", choices=PROCESS_MODES, default=PROCESS_SEQUENTIAL,
+                        help="Default task process for jobs")
+    parser.add_argument("--log-mode", choices=LOG_MODES, default=LOG_QUIET, help="What to keep in each job's crew_log.txt")
+    parser.add_argument("--bounded-memory", action="store_true",
+                        help="Keep only summaries of finished task outputs in worker memory")
+    parser.add_argument("--normalize-images", action="store_true",
+                        help="Verify mood board images and write derivatives, thumbnails and a manifest (needs Pillow)")
+    add_cache_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.normalize_images:
+        os.environ["MOOD_BOARD_NORMALIZE"] = "1"  # inherited by the worker processes
+
+    load_dotenv()
+    run_options = dict(test_mode=not args.no_test_mode, cache_mode=cache_mode_from_args(args), resume=False,
+                       log_mode=args.log_mode, process=args.process, bounded_memory=args.bounded_memory)
+    service = JobService(workers=args.workers, max_pending=args.max_pending, roles_path=args.roles,
+                         run_options=run_options)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"🛰️ Job server on http://{args.host}:{server.server_address[1]} "
+          f"({args.workers} worker(s), up to {args.max_pending} pending job(s))")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Shutting down")
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,10 @@
 # Task scaffolding for crew agents 
 
-from crewai import Task
 import json
 import os
 
+from tools.localizer_index import format_localizer_context, get_localizer_index
+
 def safe_get(d, key, default="UNKNOWN"):
     return d[key] if key in d else default
 
@@ -22,7 +23,42 @@ def health_check_brand_json(path="input/brand.json"):
         print(f"[HEALTH CHECK] ERROR: Could not parse {path}: {e}")
         return False
 
-health_check_brand_json()
+# Tool instructions shared by several tasks. Each is written once here and only
+# appended to tasks whose agent can actually use the tool (see with_shared_notes).
+DELEGATE_NOTE = (
+    "When using the Delegate work to coworker tool, always provide the 'task' and 'context' as plain strings, not as objects or dictionaries.\n"
+    "Example: {\"coworker\": \"Vignette Designer\", \"task\": \"Create 3 visual themes...\", \"context\": \"The brand is Pizza Post...\"}"
+)
+SEARCH_NOTE = (
+    "When using the WebSearchTool (SerperDevTool), ALWAYS pass a plain string as the search_query argument, never a dictionary or list "
+    "(e.g. 'Dr. Carly Tocco, Psychologist, PhD' or 'therapy office calming decor'). Refine the terms from the brand name, key traits or "
+    "specific visual queries, prefer a few relevant searches over many, and if a search fails retry with just the brand name."
+)
+
+def with_shared_notes(description, agent, search=False):
+    """
+    Append the shared tool notes a task needs: the search note when asked for,
+    the delegation note only when the task's agent is allowed to delegate.
+    """
+    notes = []
+    if search:
+        notes.append(SEARCH_NOTE)
+    if getattr(agent, "allow_delegation", False):
+        notes.append(DELEGATE_NOTE)
+    return description.rstrip("\n") + "".join("\n" + note for note in notes)
+
+# Upstream tasks whose output each task actually uses. The sequential process
+# ignores this and passes every earlier output; the parallel process (see
+# tools/task_graph.py) passes only these and runs independent tasks together.
+TASK_DEPENDENCIES = {
+    "brand_analyst": [],
+    "creative_synthesizer": ["brand_analyst"],
+    "smallbusiness_localizer": [],  # works from the brand data in its own prompt
+    "vignette_designer": ["creative_synthesizer", "smallbusiness_localizer"],
+    "visual_stylist": ["brand_analyst", "creative_synthesizer", "smallbusiness_localizer"],
+    "prompt_architect": ["brand_analyst", "creative_synthesizer", "smallbusiness_localizer",
+                         "vignette_designer", "visual_stylist"],
+}
 
 def scale_to_emotional_scope(scale):
     if scale in ["solo", "small"]:
@@ -34,14 +70,26 @@ def scale_to_emotional_scope(scale):
     else:
         return "grounded, human-scale, relatable"
 
-def get_tasks(agent_lookup, test_mode=False, brand_slug='unknown_brand'):
-    # Load the brand data robustly
-    try:
-        with open("input/brand.json") as f:
-            brand_data = json.load(f)
-    except Exception as e:
-        print(f"[TASKS] ERROR: Could not load input/brand.json: {e}")
-        brand_data = {}
+def get_tasks(agent_lookup, test_mode=False, brand_slug='unknown_brand', brand_data=None, task_factory=None):
+    """
+    Build the crew's tasks in run order. `task_factory` defaults to crewai's
+    Task; passing `dict` (with lightweight role stand-ins as agent_lookup
+    values) builds the plan without importing crewai, which --validate and
+    --dry-run rely on.
+    """
+    if task_factory is None:
+        from crewai import Task
+    else:
+        Task = task_factory
+
+    # Load the brand data robustly (callers running many brands pass it in directly)
+    if brand_data is None:
+        try:
+            with open("input/brand.json") as f:
+                brand_data = json.load(f)
+        except Exception as e:
+            print(f"[TASKS] ERROR: Could not load input/brand.json: {e}")
+            brand_data = {}
 
     # Determine business scale (default to small if not specified)
     brand_scale = brand_data.get("scale", "small")
@@ -63,16 +111,13 @@ def get_tasks(agent_lookup, test_mode=False, brand_slug='unknown_brand'):
     vignette_designer_test_output_path = f"output/{brand_slug}/vignette_designer_test_output.txt"
     visual_stylist_test_output_path = f"output/{brand_slug}/visual_stylist_test_output.txt"
     prompt_architect_test_output_path = f"output/{brand_slug}/prompt_architect_test_output.txt"
-    ad_prompts_path = f"output/{brand_slug}/ad_prompts.json"
-
-    delegate_tool_note = (
-        "When using the Delegate work to coworker tool, always provide the 'task' and 'context' as plain strings, not as objects or dictionaries.\n"
-        "Example: {\"coworker\": \"Vignette Designer\", \"task\": \"Create 3 visual themes...\", \"context\": \"The brand is Pizza Post...\"}"
-    )
+    output_dir = f"output/{brand_slug}"
+    ad_prompts_path = f"{output_dir}/ad_prompts.json"
 
     tasks = [
         Task(
-            description=(
+            name="brand_analyst",
+            description=with_shared_notes(
                 f"Analyze the following brand and perform web search to extract tone, style, and key brand traits.\n"
                 f"BRAND DATA:\n{brand_summary}\n"
                 f"Additionally, search for and download 5-10 relevant images that represent the brand's visual style, "
@@ -80,33 +125,30 @@ def get_tasks(agent_lookup, test_mode=False, brand_slug='unknown_brand'):
                 f"IMPORTANT: Only download direct image URLs (ending in .jpg, .png, etc.). "
                 f"Do NOT use social media URLs (Instagram, Facebook, etc.) as they will not work. "
                 f"Save these images to '{mood_board_path}' for use in video production. "
+                f"Collect the image URLs first, then download them all in ONE MoodBoardImageTool call by passing the list as 'image_urls' instead of one call per image. "
                 f"Focus on images that capture the brand's essence, tone, and visual identity.\n"
-                f"When using the WebSearchTool (SerperDevTool), ALWAYS pass a plain string as the search_query argument. NEVER pass a dictionary, list, or any other structure. For example, use 'Dr. Carly Tocco, Psychologist, PhD' or 'therapy office calming decor' as your search_query.\n"
-                f"Before submitting a search, analyze the brand data and refine your search terms for maximum relevance. Use the brand name, key traits, or specific visual queries that will yield the best results.\n"
-                f"If your first search fails, retry with just the brand name as a plain string.\n"
-                f"Be discerning: prioritize quality and relevance of search terms over quantity.\n"
                 f"Use this as your primary brand reference. If any brand data is missing or unclear, note it in your analysis and proceed with best effort.\n"
-                f"When using the Delegate work to coworker tool, always provide the 'task' and 'context' as plain strings, not as objects or dictionaries.\n"
-                f"Example: {{\"coworker\": \"Vignette Designer\", \"task\": \"Create 3 visual themes...\", \"context\": \"The brand is Pizza Post...\"}}"
                 + (
                     f"\nTEST MODE: In addition to your normal output, use the FileWriterTool to write a summary of your findings (including tone, style, key traits, and a list of downloaded images) to '{test_output_path}'. Also, if you write a file named 'themes_for_{brand_slug}.txt', always specify the directory as 'output/{brand_slug}' so it is saved in the correct brand output folder. If the FileWriterTool fails to write a file, log an error and continue."
                     if test_mode else ""
-                )
+                ),
+                agent_lookup["Brand Analyst"], search=True
             ),
             expected_output="A brand summary with tone, positioning, style cues, and a collection of relevant images for mood board creation.",
             agent=agent_lookup["Brand Analyst"]
         ),
         Task(
-            description=(
-                "Take the brand analysis and propose 3 core visual/experiential themes. If any upstream data is missing, proceed with best effort and note any assumptions. "
-                "When using the Delegate work to coworker tool, always provide the 'task' and 'context' as plain strings, not as objects or dictionaries.\n"
+            name="creative_synthesizer",
+            description=with_shared_notes(
+                "Take the brand analysis and propose 3 core visual/experiential themes. If any upstream data is missing, proceed with best effort and note any assumptions.\n"
                 f"Business scale: {brand_scale}. For this scale, prioritize outcomes that feel: {scale_to_emotional_scope(brand_scale)}.\n"
                 "If the business is solo or small, prioritize outcomes that feel local, grounded, and emotionally specific.\n"
                 "If the business is mid or large, explore more stylized or cinematic framings that reflect scale.\n"
                 + (
                     f"\nTEST MODE: In addition to your normal output, use the FileWriterTool to write a summary of your findings (including the 3 themes and any assumptions) to '{creative_synthesizer_test_output_path}'."
                     if test_mode else ""
-                )
+                ),
+                agent_lookup["Business Creative Synthesizer"]
             ),
             expected_output="3 concise themes with emotional framing.",
             agent=agent_lookup["Business Creative Synthesizer"]
@@ -115,15 +157,19 @@ def get_tasks(agent_lookup, test_mode=False, brand_slug='unknown_brand'):
 
     # Route to SmallBusiness Localizer if small business
     if brand_scale == "small":
+        # Resolve the business-type template here so the agent gets only the matching entry
+        localizer_match = get_localizer_index().resolve(brand_data)
         tasks.append(
             Task(
+                name="smallbusiness_localizer",
                 description=(
                     "You are the SmallBusiness Localizer. Translate small business details into grounded creative and visual context using business type, scale, location, and identity markers. Use business-type templates, regional inference, and available images to create environment and character constraints. Redirect abstract or cinematic assumptions into local, human-scale storytelling.\n"
                     f"Business scale: {brand_scale}. For this scale, prioritize outcomes that feel: {scale_to_emotional_scope(brand_scale)}.\n"
                     "If the business is solo or small, avoid owner depictions unless contextually relevant, and focus on indirect cues of scale and trust.\n"
                     "Relevant to all small businesses: Do NOT use the owner or brand name as a character unless contextually required. Use generic terms like 'therapist,' 'staff,' or 'client.'\n"
+                    + format_localizer_context(localizer_match)
                     + (
-                        f"\nTEST MODE: In addition to your normal output, use the FileWriterTool to write a summary of your findings to 'output/{{brand_slug}}/smallbusiness_localizer_test_output.txt'. Your output MUST include the relevant 'scene_constraints' (both 'avoid' and 'include') from small_business_localizer.json for this business type, and a note that these constraints should be passed to downstream agents to guide their creative decisions. If the FileWriterTool fails to write a file, log an error and continue."
+                        f"\nTEST MODE: In addition to your normal output, use the FileWriterTool to write a summary of your findings to 'output/{{brand_slug}}/smallbusiness_localizer_test_output.txt'. Your output MUST include the scene constraints (both 'avoid' and 'include') given above, and a note that these constraints should be passed to downstream agents to guide their creative decisions. If the FileWriterTool fails to write a file, log an error and continue."
                         if test_mode else ""
                     )
                 ),
@@ -134,30 +180,34 @@ def get_tasks(agent_lookup, test_mode=False, brand_slug='unknown_brand'):
 
     tasks.extend([
         Task(
-            description=(
-                "Create 6–8 second vignette ideas based on the visual themes. If any required information is missing, use your best judgment and document any assumptions. "
-                "When using the Delegate work to coworker tool, always provide the 'task' and 'context' as plain strings, not as objects or dictionaries."
+            name="vignette_designer",
+            description=with_shared_notes(
+                "Create 6–8 second vignette ideas based on the visual themes. If any required information is missing, use your best judgment and document any assumptions."
                 + (
                     f"\nTEST MODE: In addition to your normal output, use the FileWriterTool to write a summary of your findings (including the vignette concepts and any assumptions) to '{vignette_designer_test_output_path}'."
                     if test_mode else ""
-                )
+                ),
+                agent_lookup["Vignette Designer"]
             ),
             expected_output="Short vignette concepts suitable for video generation.",
             agent=agent_lookup["Vignette Designer"]
         ),
         Task(
-            description=(
-                "Suggest color palettes, visual tone, and style references for each vignette based on the brand analysis and themes. If any information is missing, proceed with best effort and document any assumptions. When using the Delegate work to coworker tool, always provide the 'task' and 'context' as plain strings, not as objects or dictionaries."
+            name="visual_stylist",
+            description=with_shared_notes(
+                "Suggest color palettes, visual tone, and style references for the campaign based on the brand analysis and themes, so they can be applied to every vignette. If vignette concepts are part of your context, tailor the guide to each of them. If any information is missing, proceed with best effort and document any assumptions."
                 + (
                     f"\nTEST MODE: In addition to your normal output, use the FileWriterTool to write a summary of your findings (including color palettes, visual tone, style references, and any assumptions) to '{visual_stylist_test_output_path}'."
                     if test_mode else ""
-                )
+                ),
+                agent_lookup["Visual Stylist"]
             ),
             expected_output="A short guide to visual tone for use in cinematic vignette creation.",
             agent=agent_lookup["Visual Stylist"]
         ),
         Task(
-            description=(
+            name="prompt_architect",
+            description=with_shared_notes(
                 "You are the Prompt Architect. For each vignette you receive, create 3-4 formatted JSON prompts suitable for video generation like Veo3. You may select the model based on the vignette's style, realism needs, or cinematic ambition — or inherit it from upstream input.\n"
                 "IMPORTANT: You must use both the final visual summary and the mood board. If there is a conflict, prioritize the final visual summary, as it is the authoritative source for the game's tone, style, and features.\n"
                 "For each vignette, return a single structured JSON block with the following fields:\n"
@@ -182,10 +232,12 @@ def get_tasks(agent_lookup, test_mode=False, brand_slug='unknown_brand'):
                 "    ]\n"
                 "  }\n"
                 "}\n\n"
-                "IMPORTANT: Use the FileWriterTool to save your final JSON output to 'output/{brand_slug}/ad_prompts.json'. Do not just return the JSON in your response - actually write it to the file using the tool.\n"
-                "After writing, confirm that the file exists in the correct directory. If the file is not found, log an error and output the JSON to the log for debugging.\n"
-                "You may include reasoning per vignette inline as a 'reasoning' field or as _comment blocks. If any required information is missing, proceed with best effort and document any assumptions. When using the Delegate work to coworker tool, always provide the 'task' and 'context' as plain strings, not as objects or dictionaries.\n"
-                "TEST MODE: In addition to your normal output, use the FileWriterTool to write a summary of your findings (including the JSON prompt(s) and any assumptions) to 'output/{brand_slug}/prompt_architect_test_output.txt'. If the FileWriterTool fails to write a file, log an error and continue."
+                f"IMPORTANT: Save each vignette's JSON block with the AdPromptTool as soon as it is ready, one call per vignette, instead of writing one big file. "
+                "If the tool returns validation errors, fix the listed fields and save that vignette again. "
+                f"When every vignette is saved, call the AdPromptTool once with finalize=true to assemble '{ad_prompts_path}'. The tool validates and writes the file, so there is no need to check that it exists.\n"
+                "You may include reasoning per vignette inline as a 'reasoning' field or as _comment blocks. If any required information is missing, proceed with best effort and document any assumptions.\n"
+                "TEST MODE: In addition to your normal output, use the FileWriterTool to write a summary of your findings (including the JSON prompt(s) and any assumptions) to 'output/{brand_slug}/prompt_architect_test_output.txt'. If the FileWriterTool fails to write a file, log an error and continue.",
+                agent_lookup["Prompt Architect"]
             ),
             expected_output=f"A JSON file saved to output/{brand_slug}/ad_prompts.json containing structured video prompts for each vignette.",
             agent=agent_lookup["Prompt Architect"],
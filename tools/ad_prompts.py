@@ -0,0 +1,193 @@
+from crewai.tools.base_tool import BaseTool
+from typing import Any, Optional
+import json
+import os
+import re
+import threading
+
+STREAM_FILENAME = "ad_prompts.jsonl"  # one validated prompt per line, appended as each vignette is done
+FINAL_FILENAME = "ad_prompts.json"    # the assembled list downstream tools expect
+
+ASPECT_RATIO_RE = re.compile(r"^\d+:\d+$")
+SCRIPT_LINE_TYPES = ("stage_direction", "dialogue")
+
+# Required scene fields and the type each must have (see the Prompt Architect task)
+SCENE_FIELDS = {
+    "title": str,
+    "duration_seconds": (int, float),
+    "fps": int,
+    "aspect_ratio": str,
+    "style": dict,
+    "character": dict,
+    "environment": dict,
+    "script": list,
+}
+
+
+def _error(path: str, message: str) -> dict:
+    return {"path": path, "error": message}
+
+
+def validate_prompt(prompt) -> list:
+    """
+    Check one vignette prompt against the scene schema.
+    Returns a list of {"path", "error"} dicts, empty when the prompt is valid.
+    """
+    if not isinstance(prompt, dict):
+        return [_error("", f"expected a JSON object, got {type(prompt).__name__}")]
+    errors = []
+    if not isinstance(prompt.get("model"), str) or not prompt["model"].strip():
+        errors.append(_error("model", "required non-empty string"))
+    if "reasoning" in prompt and not isinstance(prompt["reasoning"], str):
+        errors.append(_error("reasoning", "must be a string"))
+    scene = prompt.get("scene")
+    if not isinstance(scene, dict):
+        return errors + [_error("scene", "required object")]
+
+    for field, expected in SCENE_FIELDS.items():
+        value = scene.get(field)
+        # bool is an int subclass, but never a valid duration or fps
+        if value is None or isinstance(value, bool) or not isinstance(value, expected):
+            names = " or ".join(t.__name__ for t in expected) if isinstance(expected, tuple) else expected.__name__
+            errors.append(_error(f"scene.{field}", f"required {names}"))
+    if isinstance(scene.get("title"), str) and not scene["title"].strip():
+        errors.append(_error("scene.title", "must not be empty"))
+    for field in ("duration_seconds", "fps"):
+        value = scene.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value <= 0:
+            errors.append(_error(f"scene.{field}", "must be positive"))
+    if isinstance(scene.get("aspect_ratio"), str) and not ASPECT_RATIO_RE.match(scene["aspect_ratio"]):
+        errors.append(_error("scene.aspect_ratio", "must look like '16:9'"))
+
+    script = scene.get("script")
+    if isinstance(script, list):
+        if not script:
+            errors.append(_error("scene.script", "must contain at least one line"))
+        for index, line in enumerate(script):
+            path = f"scene.script[{index}]"
+            if not isinstance(line, dict):
+                errors.append(_error(path, "must be an object"))
+            elif line.get("type") not in SCRIPT_LINE_TYPES:
+                errors.append(_error(f"{path}.type", f"must be one of {', '.join(SCRIPT_LINE_TYPES)}"))
+            elif line["type"] == "dialogue" and not line.get("line"):
+                errors.append(_error(f"{path}.line", "dialogue needs a 'line'"))
+    return errors
+
+
+class AdPromptWriter:
+    """
+    Appends validated prompts to output/<slug>/ad_prompts.jsonl as they are
+    produced, so video-generation jobs can tail that file and start on the
+    first vignette while later ones are still being written. `assemble`
+    turns the stream into the final ad_prompts.json.
+    """
+
+    _locks = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.stream_path = os.path.join(directory, STREAM_FILENAME)
+        self.final_path = os.path.join(directory, FINAL_FILENAME)
+        with AdPromptWriter._locks_guard:
+            self._lock = AdPromptWriter._locks.setdefault(os.path.abspath(self.stream_path), threading.Lock())
+
+    def read(self) -> list:
+        try:
+            with open(self.stream_path) as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except OSError:
+            return []
+
+    def reset(self):
+        """
+        Drop the prompts of a previous run before the Prompt Architect runs again.
+        """
+        with self._lock:
+            for path in (self.stream_path, self.final_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def append(self, prompt) -> dict:
+        """
+        Validate and append one prompt. Returns a result dict with either
+        the prompt's index or the list of validation errors.
+        """
+        errors = validate_prompt(prompt)
+        with self._lock:
+            existing = self.read()
+            title = prompt["scene"]["title"] if not errors else None
+            if title and any(p["scene"].get("title") == title for p in existing):
+                errors.append(_error("scene.title", f"a prompt titled '{title}' was already written"))
+            if errors:
+                return {"ok": False, "errors": errors}
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.stream_path, "a") as f:
+                f.write(json.dumps(prompt, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        return {"ok": True, "index": len(existing), "path": self.stream_path}
+
+    def assemble(self) -> dict:
+        """
+        Write every streamed prompt to ad_prompts.json (atomically) and return a summary.
+        """
+        with self._lock:
+            prompts = self.read()
+            if not prompts:
+                return {"ok": False, "errors": [_error("", f"no prompts in {self.stream_path}")]}
+            tmp_path = self.final_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(prompts, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.final_path)
+        return {"ok": True, "prompts": len(prompts), "path": self.final_path}
+
+
+# The brand run in progress; agents (and this tool) are built once and reused
+# across brands, so run_brand points the tool at each brand's folder in turn
+# rather than letting the model choose where to write.
+_active_directory = None
+
+
+def set_active_directory(directory):
+    global _active_directory
+    _active_directory = directory
+
+
+def get_active_directory():
+    return _active_directory
+
+
+def _parse_prompt(prompt):
+    # Models sometimes pass the JSON as a string rather than an object
+    if isinstance(prompt, str):
+        try:
+            return json.loads(prompt), None
+        except ValueError as e:
+            return None, [_error("", f"not valid JSON: {e}")]
+    return prompt, None
+
+
+class AdPromptTool(BaseTool):
+    name: str = "AdPromptTool"
+    description: str = (
+        "Saves video prompts to the brand's ad_prompts.json one vignette at a time. Call it once per vignette with that "
+        "vignette's JSON object as 'prompt'; it is validated right away and any problems come back as a list of "
+        "{path, error} items to fix and resend. When every vignette is saved, call it once with finalize=true (no prompt) "
+        "to assemble ad_prompts.json. There is no need to check the file afterwards."
+    )
+
+    def _run(self, prompt: Optional[Any] = None, finalize: bool = False) -> str:
+        directory = get_active_directory()
+        if directory is None:
+            return "❌ " + json.dumps({"ok": False, "errors": [_error("", "no brand run is active")]})
+        writer = AdPromptWriter(directory)
+        result = {"ok": False, "errors": [_error("prompt", "pass a 'prompt' or finalize=true")]}
+        given = prompt is not None
+        if given:
+            prompt, errors = _parse_prompt(prompt)
+            result = {"ok": False, "errors": errors} if errors else writer.append(prompt)
+        if finalize and (not given or result["ok"]):
+            result = writer.assemble()
+        # Failures start with ❌ like the repo's other tools, so the tracer counts them
+        return json.dumps(result) if result["ok"] else "❌ " + json.dumps(result)
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+
+def task_fingerprint(task) -> str:
+    """
+    Hash of everything that shapes a task's output. A checkpoint is only reused
+    when the task it was written for is unchanged (same brand, mode, prompt).
+    """
+    role = task.agent.role if task.agent is not None else ""
+    source = "|".join([role, task.description, task.expected_output])
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+class CheckpointStore:
+    """
+    Persists each completed task's output under output/<slug>/checkpoints/ so a
+    failed run can be resumed without re-running the upstream agents.
+    """
+
+    def __init__(self, output_dir: str):
+        self.dir = os.path.join(output_dir, "checkpoints")
+        os.makedirs(self.dir, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, f"{name}.json")
+
+    def save(self, task, output):
+        checkpoint = {
+            "task": task.name,
+            "agent": task.agent.role if task.agent is not None else None,
+            "fingerprint": task_fingerprint(task),
+            "raw": output.raw,
+            "saved_at": datetime.now().isoformat(timespec='seconds'),
+        }
+        tmp_path = self._path(task.name) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(tmp_path, self._path(task.name))
+
+    def load(self, task):
+        """
+        Return the stored checkpoint for a task, or None if missing or stale.
+        """
+        try:
+            with open(self._path(task.name)) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get("fingerprint") != task_fingerprint(task):
+            return None
+        return checkpoint
+
+    def clear(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+        os.makedirs(self.dir, exist_ok=True)
+
+    def attach(self, tasks):
+        """
+        Chain a callback onto every task that writes its checkpoint on completion.
+        """
+        for task in tasks:
+            task.callback = self._callback_for(task, task.callback)
+
+    def _callback_for(self, task, previous_callback):
+        def callback(output):
+            self.save(task, output)
+            if previous_callback:
+                previous_callback(output)
+        return callback
+
+    def resume(self, tasks):
+        """
+        Restore checkpointed outputs for the longest prefix of completed tasks and
+        return the tasks that still need to run. Remaining tasks keep receiving
+        every upstream output as context, exactly as in an uninterrupted run.
+        """
+        from crewai.tasks.task_output import TaskOutput
+
+        restored = 0
+        for task in tasks:
+            checkpoint = self.load(task)
+            if checkpoint is None:
+                break
+            task.output = TaskOutput(
+                description=task.description,
+                name=task.name,
+                expected_output=task.expected_output,
+                raw=checkpoint["raw"],
+                agent=checkpoint["agent"] or "",
+            )
+            restored += 1
+
+        remaining = tasks[restored:]
+        if restored:
+            for index, task in enumerate(tasks[restored:], start=restored):
+                if not isinstance(task.context, list):
+                    task.context = tasks[:index]
+        return tasks[:restored], remaining
@@ -0,0 +1,271 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Optional
+
+DEFAULT_CACHE_DIR = os.environ.get("MOOD_BOARD_CACHE_DIR", ".cache/images")
+DEFAULT_MAX_BYTES = int(os.environ.get("MOOD_BOARD_CACHE_MAX_MB", "2048")) * 1024 * 1024
+MAX_AGE_SECONDS = 7 * 24 * 3600  # Reuse entries without ETag/Last-Modified for a week before refetching
+
+
+class ImageCache:
+    """
+    Content-addressed image store shared across brands and runs.
+
+    Each blob is stored once under blobs/<aa>/<sha256> and hard-linked (or
+    copied, where hard links aren't possible) into a brand's mood board folder,
+    so evicting a blob never takes an image away from a mood board.
+    A small per-URL index file remembers which blob a URL resolved to plus its
+    ETag/Last-Modified, so repeat downloads become conditional requests.
+    Everything is written atomically with one file per URL, so several batch
+    worker processes can share the same cache directory without locking.
+    Blob mtimes double as LRU timestamps for size-bounded eviction.
+    """
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.blob_dir = os.path.join(root, "blobs")
+        self.index_dir = os.path.join(root, "index")
+        self.tmp_dir = os.path.join(root, "tmp")
+        self.derived_dir = os.path.join(root, "derived")  # written by image_normalizer, evicted with its blob
+        for path in (self.blob_dir, self.index_dir, self.tmp_dir):
+            os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._link_lock = threading.Lock()  # Concurrent downloads may want the same board filename
+        self._total_bytes = None  # Computed lazily on the first store
+
+    # --- URL index -----------------------------------------------------
+
+    def _index_path(self, url: str) -> str:
+        return os.path.join(self.index_dir, hashlib.sha1(url.encode()).hexdigest() + ".json")
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """
+        Return the index entry for a URL if its blob is still on disk.
+        """
+        try:
+            with open(self._index_path(url)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self.blob_path(entry.get("hash", ""))):
+            return None
+        return entry
+
+    def indexed_hash(self, url: str) -> Optional[str]:
+        """
+        The blob a URL last resolved to, even if that blob has since been evicted.
+        """
+        try:
+            with open(self._index_path(url)) as f:
+                return json.load(f).get("hash")
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry: dict) -> bool:
+        # Entries with validators are always revalidated; the rest expire by age
+        if entry.get("etag") or entry.get("last_modified"):
+            return False
+        return time.time() - entry.get("fetched_at", 0) < MAX_AGE_SECONDS
+
+    def conditional_headers(self, entry: Optional[dict]) -> dict:
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, url: str, digest: str, response_headers, content_type: str = ""):
+        entry = {
+            "url": url,
+            "hash": digest,
+            "etag": response_headers.get("etag"),
+            "last_modified": response_headers.get("last-modified"),
+            "content_type": content_type,
+            "fetched_at": time.time(),
+        }
+        self._write_atomic(self._index_path(url), json.dumps(entry).encode())
+        return entry
+
+    # --- Blobs -----------------------------------------------------------
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def new_temp_file(self):
+        """
+        Open a temp file inside the cache so the finished blob can be renamed into place.
+        """
+        return tempfile.NamedTemporaryFile(dir=self.tmp_dir, delete=False)
+
+    def store(self, temp_path: str, digest: str) -> str:
+        """
+        Move a fully written temp file into the blob store (no-op if the blob already exists).
+        """
+        blob = self.blob_path(digest)
+        if os.path.exists(blob):
+            os.remove(temp_path)
+            self.touch(digest)
+            return blob
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        size = os.path.getsize(temp_path)
+        os.chmod(temp_path, 0o644)  # Temp files are private by default; mood board links should not be
+        os.replace(temp_path, blob)
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += size
+            over_budget = self._total_bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+        return blob
+
+    def touch(self, digest: str):
+        try:
+            os.utime(self.blob_path(digest))
+        except OSError:
+            pass
+
+    def link_into(self, digest: str, save_path: str, filename: str, replaces: Optional[str] = None) -> str:
+        """
+        Place a cached blob into a mood board folder and return the final path.
+        A file under the same name is replaced only if it holds `replaces` (the
+        blob this URL resolved to before, i.e. the URL now serves a new image)
+        or is a broken link; any other content belongs to another URL, so the
+        hash prefix is appended instead.
+        """
+        blob = self.blob_path(digest)
+        stem, ext = os.path.splitext(filename)
+        with self._link_lock:
+            dest = os.path.join(save_path, filename)
+            if os.path.lexists(dest) and not os.path.isdir(dest):
+                current = digest if _same_file(dest, blob) else _file_digest(dest)
+                if current == digest:
+                    return dest
+                if current is not None and current != replaces:
+                    dest = os.path.join(save_path, f"{stem}_{digest[:8]}{ext}")
+                    if os.path.lexists(dest):
+                        return dest  # Hash-suffixed names are content-addressed already
+            elif os.path.isdir(dest):
+                dest = os.path.join(save_path, f"{stem}_{digest[:8]}{ext}")
+            # Link to a temp name first so the swap is atomic for anyone reading the board
+            temp = os.path.join(save_path, f".{filename}.{os.getpid()}.{threading.get_ident()}.tmp")
+            if os.path.lexists(temp):
+                os.remove(temp)  # left behind by a crashed earlier run
+            try:
+                os.link(blob, temp)
+            except OSError:
+                shutil.copyfile(blob, temp)
+            os.replace(temp, dest)
+        self.touch(digest)
+        return dest
+
+    # --- Eviction ----------------------------------------------------------
+
+    def _blobs(self):
+        for dirpath, _, filenames in os.walk(self.blob_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _derived_files(self, digest: str):
+        folder = os.path.join(self.derived_dir, digest[:2])
+        try:
+            names = [name for name in os.listdir(folder) if name.startswith(digest)]
+        except OSError:
+            return []
+        files = []
+        for name in names:
+            try:
+                files.append((os.path.join(folder, name), os.path.getsize(os.path.join(folder, name))))
+            except OSError:
+                pass
+        return files
+
+    def _derived_size(self) -> int:
+        total = 0
+        for dirpath, _, filenames in os.walk(self.derived_dir):
+            for filename in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, filename))
+                except OSError:
+                    pass
+        return total
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._blobs()) + self._derived_size()
+
+    def evict(self) -> int:
+        """
+        Delete least recently used blobs until the cache fits in max_bytes,
+        each with its normalized derivatives (derived/, see image_normalizer),
+        which count towards the budget too. Mood boards keep their hard links
+        or copies. Returns the bytes freed.
+        """
+        with self._lock:
+            blobs = sorted(self._blobs(), key=lambda blob: blob[2])
+            total = sum(size for _, size, _ in blobs) + self._derived_size()
+            freed = 0
+            for path, size, _ in blobs:
+                if total - freed <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    freed += size
+                except OSError:
+                    continue
+                for derived, derived_size in self._derived_files(os.path.basename(path)):
+                    try:
+                        os.remove(derived)
+                        freed += derived_size
+                    except OSError:
+                        pass
+            self._total_bytes = total - freed
+            return freed
+
+    def _write_atomic(self, path: str, data: bytes):
+        with tempfile.NamedTemporaryFile(dir=self.tmp_dir, delete=False) as f:
+            f.write(data)
+        os.replace(f.name, path)
+
+
+def _file_digest(path: str) -> Optional[str]:
+    sha = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b""):
+                sha.update(chunk)
+    except OSError:
+        return None
+    return sha.hexdigest()
+
+
+def _same_file(a: str, b: str) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ImageCache()
+        return _default_cache
@@ -1,11 +1,55 @@
 from crewai.tools.base_tool import BaseTool
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 import requests
+import hashlib
+import json
 import os
 from urllib.parse import urlparse
-import time
-from typing import Optional
+import threading
+from typing import List, Optional
 import mimetypes
 
+from tools.image_cache import get_image_cache
+from tools.image_normalizer import get_normalization_stage
+from tools.instrumentation import get_active_tracer
+from tools.resilience import resilient_request
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+MAX_IMAGE_BYTES = 15 * 1024 * 1024  # Refuse anything bigger than 15 MB
+CHUNK_SIZE = 64 * 1024
+MAX_WORKERS = 8  # Concurrent downloads per batch
+PER_HOST_LIMIT = 2  # Concurrent downloads against any single host
+
+_session = None
+_session_lock = threading.Lock()
+_host_semaphores = {}
+
+
+def get_session():
+    """
+    Shared keep-alive session so repeated downloads reuse pooled connections.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
+
+
+def _host_semaphore(url):
+    host = urlparse(url).netloc.lower()
+    with _session_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return _host_semaphores[host]
+
 def is_valid_image_url(url: str) -> bool:
     """
     Check if a URL is likely to be a direct image URL.
@@ -38,9 +82,56 @@ def is_valid_image_url(url: str) -> bool:
     
     return False
 
-def download_mood_board_image(image_url: str, save_path: str):
+def _content_type_extension(content_type: str) -> str:
+    # Try to get extension from content-type
+    if 'jpeg' in content_type or 'jpg' in content_type:
+        return '.jpg'
+    elif 'png' in content_type:
+        return '.png'
+    elif 'gif' in content_type:
+        return '.gif'
+    elif 'webp' in content_type:
+        return '.webp'
+    return '.jpg'  # default
+
+def _mood_board_filename(image_url: str, content_type: str, digest: str) -> str:
+    # Generate filename from URL
+    path = urlparse(image_url).path.rstrip('/')  # Remove trailing slashes
+    filename = os.path.basename(path)
+    
+    # If filename is empty or looks like a directory, fall back to a content-hash name
+    if not filename or '.' not in filename or filename.endswith('.'):
+        filename = f"mood_image_{digest[:12]}{_content_type_extension(content_type)}"
+    return filename
+
+def _queue_normalization(cache, digest: str, filepath: str, image_url: str):
+    """
+    Hand the image to the optional normalization stage (tools/image_normalizer.py),
+    which runs in a process pool so the download returns straight away.
+    The image is already saved, so a failure here is only reported, never returned.
+    """
+    try:
+        stage = get_normalization_stage()
+        if stage is not None:
+            stage.submit(filepath, cache.blob_path(digest), digest, image_url,
+                         os.path.join(cache.derived_dir, digest[:2]))
+    except Exception as e:
+        print(f"⚠️ Could not queue {filepath} for normalization: {e}")
+
+def _trace_download(image_url: str, source: str, filepath: str):
+    # Which cache path served the image goes to the run trace, not the agent: the tool
+    # result must read the same on every rerun so the LLM response cache keeps hitting
+    tracer = get_active_tracer()
+    if tracer is not None:
+        tracer.record("image_download", url=image_url, source=source, path=filepath)
+
+def download_mood_board_image(image_url: str, save_path: str, session=None, cache=None):
     """
     Downloads an image from a URL and saves it to the specified mood board folder.
+    The body is streamed to disk in chunks and the download is abandoned as soon as
+    the headers show a non-image Content-Type or an over-size Content-Length.
+    Images are stored once in the shared ImageCache and linked into the mood board;
+    repeat URLs are revalidated with ETag/Last-Modified instead of re-downloaded.
     Returns a success or error message.
     """
     try:
@@ -51,58 +142,104 @@ def download_mood_board_image(image_url: str, save_path: str):
         # Create mood board directory
         os.makedirs(save_path, exist_ok=True)
         
-        # Download image
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(image_url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        # Check if response is actually an image
-        content_type = response.headers.get('content-type', '').lower()
-        if not content_type.startswith('image/'):
-            return f"❌ URL does not return an image: {image_url}\nContent-Type: {content_type}\nThis appears to be an HTML page, not an image. Please use direct image URLs."
-        
-        # Generate filename from URL
-        path = urlparse(image_url).path.rstrip('/')  # Remove trailing slashes
-        filename = os.path.basename(path)
-        
-        # If filename is empty or looks like a directory, generate a fallback
-        if not filename or '.' not in filename or filename.endswith('.'):
-            # Try to get extension from content-type
-            if 'jpeg' in content_type or 'jpg' in content_type:
-                ext = '.jpg'
-            elif 'png' in content_type:
-                ext = '.png'
-            elif 'gif' in content_type:
-                ext = '.gif'
-            elif 'webp' in content_type:
-                ext = '.webp'
-            else:
-                ext = '.jpg'  # default
-            filename = f"mood_image_{int(time.time())}{ext}"
+        cache = cache or get_image_cache()
+        cached = cache.lookup(image_url)
+        previous = cache.indexed_hash(image_url)  # this URL's earlier image, which a new one may replace on the board
+        if cached and cache.is_fresh(cached):
+            filepath = cache.link_into(cached["hash"], save_path, _mood_board_filename(image_url, cached.get("content_type", ""), cached["hash"]))
+            _queue_normalization(cache, cached["hash"], filepath, image_url)
+            _trace_download(image_url, "cached", filepath)
+            return f"✅ Image downloaded successfully to {filepath}"
         
-        filepath = os.path.join(save_path, filename)
-        
-        # Ensure we never create a directory by mistake
-        if os.path.isdir(filepath):
-            # If a directory exists with this name, add a suffix
-            filename = f"{filename}_img"
-            filepath = os.path.join(save_path, filename)
-        
-        # Save image
-        with open(filepath, 'wb') as f:
-            f.write(response.content)
+        # Download image (headers first, body streamed below); rate limited and retried per host
+        session = session or get_session()
+        request_headers = cache.conditional_headers(cached)
+        with _host_semaphore(image_url), \
+                resilient_request(session, "GET", image_url, headers=request_headers, timeout=15, stream=True) as response:
+            if response.status_code == 304 and cached:
+                validators = {
+                    "etag": response.headers.get("etag") or cached.get("etag"),
+                    "last-modified": response.headers.get("last-modified") or cached.get("last_modified"),
+                }
+                cache.record(image_url, cached["hash"], validators, cached.get("content_type", ""))
+                filepath = cache.link_into(cached["hash"], save_path, _mood_board_filename(image_url, cached.get("content_type", ""), cached["hash"]))
+                _queue_normalization(cache, cached["hash"], filepath, image_url)
+                _trace_download(image_url, "not_modified", filepath)
+                return f"✅ Image downloaded successfully to {filepath}"
+            response.raise_for_status()
+            
+            # Check if response is actually an image before reading the body
+            content_type = response.headers.get('content-type', '').lower()
+            if not content_type.startswith('image/'):
+                return f"❌ URL does not return an image: {image_url}\nContent-Type: {content_type}\nThis appears to be an HTML page, not an image. Please use direct image URLs."
+            content_length = response.headers.get('content-length')
+            if content_length and content_length.isdigit() and int(content_length) > MAX_IMAGE_BYTES:
+                return f"❌ Image too large: {image_url}\nContent-Length: {content_length} bytes (limit {MAX_IMAGE_BYTES})."
+            
+            # Stream into a cache temp file, hashing as we go, so partial downloads never look complete
+            sha = hashlib.sha256()
+            written = 0
+            with cache.new_temp_file() as f:
+                try:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        written += len(chunk)
+                        if written > MAX_IMAGE_BYTES:
+                            break
+                        sha.update(chunk)
+                        f.write(chunk)
+                except Exception:
+                    f.close()
+                    os.remove(f.name)
+                    raise
+            if written > MAX_IMAGE_BYTES:
+                os.remove(f.name)
+                return f"❌ Image too large: {image_url}\nAborted after {MAX_IMAGE_BYTES} bytes."
+            digest = sha.hexdigest()
+            cache.store(f.name, digest)
+            cache.record(image_url, digest, response.headers, content_type)
         
+        filepath = cache.link_into(digest, save_path, _mood_board_filename(image_url, content_type, digest), replaces=previous)
+        _queue_normalization(cache, digest, filepath, image_url)
+        _trace_download(image_url, "fetched", filepath)
         return f"✅ Image downloaded successfully to {filepath}"
     except requests.exceptions.RequestException as e:
         return f"❌ Failed to download image from {image_url}: Network error - {str(e)}"
     except Exception as e:
         return f"❌ Failed to download image from {image_url}: {str(e)}"
 
+def download_mood_board_images(image_urls: List[str], save_path: str, max_workers: int = MAX_WORKERS):
+    """
+    Downloads several images concurrently over the shared session.
+    Duplicate URLs are fetched once. Returns one result message per unique URL, in order.
+    """
+    unique_urls = list(dict.fromkeys(url.strip() for url in image_urls if url and url.strip()))
+    if not unique_urls:
+        return []
+    session = get_session()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_urls))) as pool:
+        return list(pool.map(lambda url: download_mood_board_image(url, save_path, session=session), unique_urls))
+
+def _parse_url_list(image_urls):
+    # Agents sometimes pass the list as a JSON string or a comma/newline separated string
+    if isinstance(image_urls, str):
+        try:
+            parsed = json.loads(image_urls)
+            if isinstance(parsed, list):
+                return [str(url) for url in parsed]
+        except ValueError:
+            pass
+        return [url for url in image_urls.replace('\n', ',').split(',')]
+    return list(image_urls)
+
 class MoodBoardImageTool(BaseTool):
     name: str = "MoodBoardImageTool"
-    description: str = "Downloads images from URLs and saves them to a mood board folder for video production. IMPORTANT: Only use direct image URLs (ending in .jpg, .png, etc.) or stock photo URLs. Do NOT use social media URLs like Instagram, Facebook, etc. as they will not work."
+    description: str = "Downloads images from URLs and saves them to a mood board folder for video production. Pass a single 'image_url', or pass several at once as a list in 'image_urls' to download them all in one call (faster). IMPORTANT: Only use direct image URLs (ending in .jpg, .png, etc.) or stock photo URLs. Do NOT use social media URLs like Instagram, Facebook, etc. as they will not work."
     
-    def _run(self, image_url: str, save_path: str) -> str:
-        return download_mood_board_image(image_url, save_path) 
\ No newline at end of file
+    def _run(self, save_path: str, image_url: Optional[str] = None, image_urls: Optional[List[str]] = None) -> str:
+        if image_urls:
+            results = download_mood_board_images(_parse_url_list(image_urls), save_path)
+            succeeded = sum(1 for r in results if r.startswith("✅"))
+            return f"Downloaded {succeeded}/{len(results)} images:\n" + "\n".join(results)
+        if image_url:
+            return download_mood_board_image(image_url, save_path)
+        return "❌ No image URL provided. Pass 'image_url' or a list of 'image_urls'."
@@ -0,0 +1,329 @@
+from concurrent.futures import ProcessPoolExecutor
+import importlib.util
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+
+# Optional post-download stage for mood boards (enable with MOOD_BOARD_NORMALIZE=1
+# or --normalize-images). Each downloaded blob is sniffed by its magic bytes,
+# decoded with Pillow in a process pool, and turned into a capped-resolution
+# derivative plus a thumbnail. Results land in mood_board/manifest.json.
+# Nothing here imports crewai, so the pool's worker processes start quickly.
+
+MAX_SIDE = int(os.environ.get("MOOD_BOARD_MAX_SIDE", "1600"))
+THUMB_SIDE = int(os.environ.get("MOOD_BOARD_THUMB_SIDE", "320"))
+DERIVATIVE_FORMAT = os.environ.get("MOOD_BOARD_DERIVATIVE_FORMAT", "webp")  # or "jpeg"
+NEAR_DUPLICATE_BITS = 6  # perceptual hashes this close (out of 64 bits) count as the same picture
+NEAR_DUPLICATE_COLOR_DISTANCE = 48  # ...if their dominant colours are also this close (RGB distance)
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+MANIFEST_NAME = "manifest.json"
+
+# (magic prefix, offset, format). WebP also needs 'WEBP' at offset 8, checked below.
+MAGIC_BYTES = [
+    (b"\xff\xd8\xff", 0, "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", 0, "png"),
+    (b"GIF87a", 0, "gif"),
+    (b"GIF89a", 0, "gif"),
+    (b"RIFF", 0, "webp"),
+    (b"BM", 0, "bmp"),
+    (b"II*\x00", 0, "tiff"),
+    (b"MM\x00*", 0, "tiff"),
+]
+
+
+def normalization_enabled() -> bool:
+    return os.environ.get("MOOD_BOARD_NORMALIZE", "").lower() in ("1", "true", "yes")
+
+
+def sniff_format(head: bytes):
+    """
+    The image format according to the file's own bytes: a raster format name,
+    'svg' for vector images, or None when it is not an image at all.
+    """
+    for magic, offset, name in MAGIC_BYTES:
+        if head[offset:offset + len(magic)] == magic:
+            if name == "webp" and head[8:12] != b"WEBP":
+                continue
+            return name
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if text.startswith(b"<svg") or (text.startswith(b"<?xml") and b"<svg" in text):
+        return "svg"
+    return None
+
+
+def _dhash(image) -> str:
+    """
+    64-bit difference hash: survives re-encoding and resizing, so near-duplicates match.
+    """
+    pixels = list(image.convert("L").resize((9, 8)).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return f"{bits:016x}"
+
+
+def _dominant_colors(image, count: int = 5) -> list:
+    # Nearest-neighbour keeps real pixel colours instead of blending neighbours together
+    small = image.convert("RGB").resize((64, 64), resample=0)
+    quantized = small.quantize(colors=count)
+    palette = quantized.getpalette()
+    ranked = sorted(quantized.getcolors(), reverse=True)
+    return [f"#{palette[i * 3]:02x}{palette[i * 3 + 1]:02x}{palette[i * 3 + 2]:02x}" for _, i in ranked[:count]]
+
+
+def _save_atomic(image, path: str, fmt: str):
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as f:
+        image.save(f, format=fmt.upper(), quality=82)
+    os.replace(f.name, path)
+
+
+def derive_image(blob_path: str, digest: str, derived_dir: str, max_side: int = MAX_SIDE,
+                 thumb_side: int = THUMB_SIDE, fmt: str = DERIVATIVE_FORMAT) -> dict:
+    """
+    Verify and decode one blob, then write its derivative and thumbnail under
+    derived_dir (content-addressed, so each blob is only processed once).
+    Runs in the pool's worker processes. Returns the blob's manifest fields.
+    """
+    meta_path = os.path.join(derived_dir, f"{digest}-{max_side}-{thumb_side}-{fmt}.json")
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    with open(blob_path, "rb") as f:
+        sniffed = sniff_format(f.read(512))
+    if sniffed is None:
+        return {"status": "rejected", "reason": "not an image (magic bytes)"}
+    if sniffed == "svg":
+        return {"status": "skipped", "reason": "vector image (svg), not rasterized", "format": "svg"}
+
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(blob_path) as image:
+            image.verify()
+        with Image.open(blob_path) as image:
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except Exception as e:
+        return {"status": "rejected", "reason": f"could not decode: {e}", "format": sniffed}
+
+    width, height = image.size
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    if fmt == "jpeg" or not has_alpha:
+        if has_alpha:
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image.convert("RGBA"), mask=image.convert("RGBA").getchannel("A"))
+            image = background
+        else:
+            image = image.convert("RGB")
+    else:
+        image = image.convert("RGBA")
+
+    os.makedirs(derived_dir, exist_ok=True)
+    extension = "jpg" if fmt == "jpeg" else fmt
+    derivative_path = os.path.join(derived_dir, f"{digest}-{max_side}.{extension}")
+    thumb_path = os.path.join(derived_dir, f"{digest}-thumb{thumb_side}.{extension}")
+    derivative = image.copy()
+    derivative.thumbnail((max_side, max_side))
+    _save_atomic(derivative, derivative_path, fmt)
+    thumb = image.copy()
+    thumb.thumbnail((thumb_side, thumb_side))
+    _save_atomic(thumb, thumb_path, fmt)
+
+    meta = {
+        "status": "ok",
+        "format": sniffed,
+        "width": width,
+        "height": height,
+        "derivative": derivative_path,
+        "derivative_size": list(derivative.size),
+        "thumbnail": thumb_path,
+        "dominant_colors": _dominant_colors(image),
+        "phash": _dhash(image),
+    }
+    with tempfile.NamedTemporaryFile("w", dir=derived_dir, delete=False) as f:
+        json.dump(meta, f)
+    os.replace(f.name, meta_path)
+    return meta
+
+
+def _hamming(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def _rgb(color: str) -> tuple:
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+
+
+def _near_duplicate(a: dict, b: dict) -> bool:
+    """
+    Same picture by difference hash and by dominant colour. Flat images (solid
+    colours, simple logos) all hash to nearly 0 or all ones, so a hash that
+    close to either carries too little information to call anything a duplicate.
+    """
+    bits = bin(int(a["phash"], 16)).count("1")
+    if bits <= NEAR_DUPLICATE_BITS or bits >= 64 - NEAR_DUPLICATE_BITS:
+        return False
+    if _hamming(a["phash"], b["phash"]) > NEAR_DUPLICATE_BITS:
+        return False
+    colors_a, colors_b = a.get("dominant_colors") or [], b.get("dominant_colors") or []
+    if not colors_a or not colors_b:
+        return False
+    distance = sum((x - y) ** 2 for x, y in zip(_rgb(colors_a[0]), _rgb(colors_b[0]))) ** 0.5
+    return distance <= NEAR_DUPLICATE_COLOR_DISTANCE
+
+
+def _link(source: str, dest: str):
+    """
+    Link (or copy) source to dest, replacing whatever dest held before, e.g. the
+    derivative of an earlier image when the board file now has new content.
+    """
+    try:
+        if os.path.samefile(source, dest):
+            return
+    except OSError:
+        pass
+    temp = f"{dest}.{os.getpid()}.tmp"
+    if os.path.lexists(temp):
+        os.remove(temp)
+    try:
+        os.link(source, temp)
+    except OSError:
+        shutil.copyfile(source, temp)
+    os.replace(temp, dest)
+
+
+class NormalizationStage:
+    """
+    Runs derive_image for downloaded mood board images in a process pool
+    without blocking the tool call that downloaded them. As each image is
+    finished its derivative and thumbnail are linked into the mood board's
+    normalized/ and thumbs/ folders and the board's manifest.json is updated.
+    Near-duplicates (by perceptual hash and dominant colour) and non-images are recorded in the
+    manifest but get no derivative; non-images are also removed from the board.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS):
+        self.max_workers = max_workers
+        self._pool = None
+        self._pending = 0
+        self._manifests = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn: this process runs download threads, which fork does not mix well with
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def submit(self, image_path: str, blob_path: str, digest: str, source_url: str, derived_dir: str):
+        with self._lock:
+            future = self._get_pool().submit(derive_image, blob_path, digest, derived_dir)
+            self._pending += 1
+        future.add_done_callback(lambda f: self._finish(f, image_path, digest, source_url))
+        return future
+
+    def _manifest(self, board_dir: str) -> dict:
+        if board_dir not in self._manifests:
+            try:
+                with open(os.path.join(board_dir, MANIFEST_NAME)) as f:
+                    self._manifests[board_dir] = json.load(f)
+            except (OSError, ValueError):
+                self._manifests[board_dir] = {"images": {}}
+        return self._manifests[board_dir]
+
+    def _finish(self, future, image_path: str, digest: str, source_url: str):
+        try:
+            meta = future.result()
+        except Exception as e:
+            meta = {"status": "error", "reason": str(e)}
+        try:
+            self._record(meta, image_path, digest, source_url)
+        finally:
+            with self._idle:
+                self._pending -= 1
+                self._idle.notify_all()
+
+    def _record(self, meta: dict, image_path: str, digest: str, source_url: str):
+        board_dir = os.path.normpath(os.path.dirname(image_path))
+        filename = os.path.basename(image_path)
+        entry = {"file": filename, "source_url": source_url, "hash": digest,
+                 **{k: v for k, v in meta.items() if k not in ("derivative", "thumbnail")}}
+        with self._lock:
+            manifest = self._manifest(board_dir)
+            if meta.get("status") == "ok":
+                for other in manifest["images"].values():
+                    if other["file"] != filename and other.get("status") == "ok" and not other.get("duplicate_of") \
+                            and other["hash"] != digest and _near_duplicate(meta, other):
+                        entry["duplicate_of"] = other["file"]
+                        break
+                if not entry.get("duplicate_of"):
+                    stem = os.path.splitext(filename)[0]
+                    for key, folder in (("derivative", "normalized"), ("thumbnail", "thumbs")):
+                        os.makedirs(os.path.join(board_dir, folder), exist_ok=True)
+                        dest = os.path.join(folder, stem + os.path.splitext(meta[key])[1])
+                        _link(meta[key], os.path.join(board_dir, dest))
+                        entry[key] = dest
+            elif meta.get("status") == "rejected" and os.path.lexists(image_path):
+                os.remove(image_path)
+            manifest["images"][filename] = entry
+            path = os.path.join(board_dir, MANIFEST_NAME)
+            with tempfile.NamedTemporaryFile("w", dir=board_dir, delete=False) as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(f.name, path)
+
+    def wait(self, timeout=None) -> bool:
+        """
+        Block until every submitted image has been processed and recorded.
+        Returns False if the timeout ran out first.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def board_summary(self, board_dir: str) -> dict:
+        """
+        Image counts by status (ok, duplicate, skipped, rejected, error) for one mood board.
+        """
+        counts = {}
+        with self._lock:
+            for entry in self._manifest(os.path.normpath(board_dir))["images"].values():
+                status = "duplicate" if entry.get("duplicate_of") else entry.get("status", "error")
+                counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+
+_stage = None
+_stage_lock = threading.Lock()
+_warned_missing_pillow = False
+
+
+def get_normalization_stage():
+    """
+    The process-wide stage, or None when normalization is off or Pillow is missing.
+    """
+    global _stage, _warned_missing_pillow
+    if not normalization_enabled():
+        return None
+    if importlib.util.find_spec("PIL") is None:
+        if not _warned_missing_pillow:
+            _warned_missing_pillow = True
+            print("⚠️ MOOD_BOARD_NORMALIZE is set but Pillow is not installed; skipping image normalization")
+        return None
+    with _stage_lock:
+        if _stage is None:
+            _stage = NormalizationStage()
+        return _stage
@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+# USD per 1M tokens (prompt, completion). Matched by longest model-name prefix.
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "o4-mini": (1.10, 4.40),
+}
+
+
+def estimate_tokens(text) -> int:
+    # Rough rule of thumb when the provider does not report usage (~4 chars per token)
+    return max(1, len(str(text)) // 4) if text else 0
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int):
+    model = (model or "").split("/")[-1]
+    matches = [name for name in MODEL_PRICES if model.startswith(name)]
+    if not matches:
+        return None
+    prompt_price, completion_price = MODEL_PRICES[max(matches, key=len)]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class RunTracer:
+    """
+    Collects timing, token, cost and tool events for one brand run.
+
+    Events are appended to output/<slug>/run_trace.jsonl as they happen; the
+    aggregated report is written by `write_report` once the crew finishes.
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.trace_path = os.path.join(output_dir, "run_trace.jsonl")
+        self.events = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        with open(self.trace_path, "w"):
+            pass
+
+    def record(self, kind: str, **fields):
+        event = {"event": kind, "ts": datetime.now().isoformat(timespec='milliseconds'), **fields}
+        with self._lock:
+            self.events.append(event)
+            with open(self.trace_path, "a") as f:
+                f.write(json.dumps(event, default=str) + "\n")
+
+    def build_report(self, tasks=(), extra=None):
+        """
+        Aggregate the recorded events per task, per agent role and per tool.
+        """
+        llm_calls = [e for e in self.events if e["event"] == "llm_call"]
+        tool_calls = [e for e in self.events if e["event"] == "tool_call"]
+
+        def llm_totals(calls):
+            costs = [c["cost_usd"] for c in calls if c["cost_usd"] is not None]
+            return {
+                "llm_calls": len(calls),
+                "llm_seconds": round(sum(c["seconds"] for c in calls), 3),
+                "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+                "completion_tokens": sum(c["completion_tokens"] for c in calls),
+                "cost_usd": round(sum(costs), 6) if costs else None,
+            }
+
+        per_task = []
+        for task in tasks:
+            duration = None
+            if task.start_time and task.end_time:
+                duration = round((task.end_time - task.start_time).total_seconds(), 3)
+            per_task.append({
+                "task": task.name,
+                "agent": task.agent.role if task.agent is not None else None,
+                "wall_seconds": duration,
+                **llm_totals([c for c in llm_calls if c.get("task") == task.name]),
+            })
+
+        per_agent = {}
+        for role in sorted({c["agent"] for c in llm_calls}):
+            per_agent[role] = llm_totals([c for c in llm_calls if c["agent"] == role])
+
+        per_tool = {}
+        for name in sorted({c["tool"] for c in tool_calls}):
+            calls = [c for c in tool_calls if c["tool"] == name]
+            latencies = [c["seconds"] for c in calls]
+            per_tool[name] = {
+                "calls": len(calls),
+                "success_rate": round(sum(1 for c in calls if c["ok"]) / len(calls), 3),
+                "mean_seconds": round(sum(latencies) / len(latencies), 3),
+                "max_seconds": round(max(latencies), 3),
+            }
+
+        return {
+            "wall_seconds": round(time.perf_counter() - self.started, 3),
+            "totals": llm_totals(llm_calls),
+            "tasks": per_task,
+            "agents": per_agent,
+            "tools": per_tool,
+            **(extra or {}),
+        }
+
+    def write_report(self, tasks=(), extra=None):
+        """
+        Write run_report.json plus a plain-text summary table and return the table.
+        """
+        report = self.build_report(tasks, extra)
+        with open(os.path.join(self.output_dir, "run_report.json"), "w") as f:
+            json.dump(report, f, indent=2)
+        table = format_report_table(report)
+        with open(os.path.join(self.output_dir, "run_report.txt"), "w") as f:
+            f.write(table + "\n")
+        return table
+
+
+def _fmt(value, spec=""):
+    return "-" if value is None else format(value, spec)
+
+
+def format_report_table(report) -> str:
+    lines = [f"{'Task':<26}{'Agent':<31}{'Wall s':>9}{'LLM':>6}{'Prompt tok':>12}{'Compl tok':>11}{'Cost $':>10}"]
+    for row in report["tasks"]:
+        lines.append(
+            f"{row['task']:<26}{row['agent'] or '-':<31}{_fmt(row['wall_seconds'], '.1f'):>9}{row['llm_calls']:>6}"
+            f"{row['prompt_tokens']:>12}{row['completion_tokens']:>11}{_fmt(row['cost_usd'], '.4f'):>10}"
+        )
+    totals = report["totals"]
+    lines.append(
+        f"{'TOTAL':<57}{_fmt(report['wall_seconds'], '.1f'):>9}{totals['llm_calls']:>6}"
+        f"{totals['prompt_tokens']:>12}{totals['completion_tokens']:>11}{_fmt(totals['cost_usd'], '.4f'):>10}"
+    )
+    if report["tools"]:
+        lines.append("")
+        lines.append(f"{'Tool':<40}{'Calls':>7}{'Success':>9}{'Mean s':>9}{'Max s':>9}")
+        for name, row in report["tools"].items():
+            lines.append(f"{name:<40}{row['calls']:>7}{row['success_rate']:>9.0%}{row['mean_seconds']:>9.2f}{row['max_seconds']:>9.2f}")
+    apis = report.get("external_apis")
+    if apis:
+        lines.append("")
+        lines.append(f"{'External API':<40}{'Calls':>7}{'Retries':>9}{'Failed':>9}{'Fast-fail':>11}{'Throttled s':>13}")
+        for name, row in apis.items():
+            lines.append(f"{name:<40}{row['calls']:>7}{row['retries']:>9}{row['failures']:>9}"
+                         f"{row['short_circuits']:>11}{row['throttled_seconds']:>13.2f}")
+    budget = report.get("prompt_budget")
+    if budget:
+        lines.append("")
+        lines.append(f"{'Prompt budget: ' + str(budget['budget_tokens']) + ' tok/task':<40}{'Instr':>7}{'Context':>9}{'Sent':>9}{'Saved':>9}")
+        for row in budget["tasks"]:
+            lines.append(f"{row['task']:<40}{row['instruction_tokens']:>7}{row['context_tokens_raw']:>9}"
+                         f"{row['context_tokens_sent']:>9}{row['saved_tokens']:>9}")
+        lines.append(f"{'TOTAL SAVED':<65}{budget['saved_tokens']:>9}")
+    return "\n".join(lines)
+
+
+# Agents are built once and reused across brands, so the wrappers report to
+# whichever tracer the current run has activated.
+_active_tracer = None
+
+
+def set_active_tracer(tracer):
+    global _active_tracer
+    _active_tracer = tracer
+
+
+def get_active_tracer():
+    return _active_tracer
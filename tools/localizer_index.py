@@ -0,0 +1,242 @@
+import difflib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+
+DEFAULT_LOCALIZER_PATH = os.environ.get(
+    "LOCALIZER_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "small_business_localizer.json"),
+)
+
+STOP_WORDS = {"a", "an", "and", "the", "of", "for", "in", "on", "or", "with", "by", "to", "at"}
+# Words too generic to identify a business type on their own ("Full-service agency").
+# They still count towards a business type's score when the brand uses them too.
+GENERIC_WORDS = {
+    "service", "business", "company", "group", "practice", "shop", "studio", "small",
+    "local", "owned", "co", "inc", "llc",
+}
+MIN_SCORE = 0.5        # share of a business type's (weighted) words the brand must mention
+FUZZY_CUTOFF = 0.75    # difflib ratio for a misspelt/inflected word to count ("barber" ~ "barbershop")
+FUZZY_PREFIX = 2       # ...and it must start the same way ("leading" is not "cleaning")
+
+WORD_RE = re.compile(r"[^\W_]+")
+
+
+def normalize_word(word: str) -> str:
+    # Cheap plural folding so "florists" finds "florist" without a stemmer
+    if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text) -> list:
+    # Accents are folded so "Café" finds "cafe"
+    text = "".join(c for c in unicodedata.normalize("NFKD", str(text).lower()) if not unicodedata.combining(c))
+    return [normalize_word(word) for word in WORD_RE.findall(text) if word not in STOP_WORDS]
+
+
+def business_type_aliases(business_type: str) -> list:
+    """
+    The phrases a business_type can be referred to by:
+    'contractor/handyman' -> both words, 'therapist (group practice)' -> with and without the qualifier,
+    'therapeutic massage' -> also its head noun 'massage' (but not 'cleaning service' -> 'service').
+    """
+    base = re.sub(r"\(.*?\)", " ", business_type)
+    aliases = [business_type] + [part for part in base.split("/") if part.strip()]
+    phrases = [" ".join(tokenize(alias)) for alias in aliases if tokenize(alias)]
+    heads = [phrase.split()[-1] for phrase in phrases if phrase.split()[-1] not in GENERIC_WORDS]
+    return list(dict.fromkeys(phrases + heads))
+
+
+def _trigrams(word: str) -> set:
+    padded = f"${word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LocalizerIndex:
+    """
+    In-memory index over small_business_localizer.json.
+
+    Resolution order for a brand: an exact business-type phrase (from an
+    explicit 'business_type' field or anywhere in the brand text), then a
+    weighted word match needing every word of a one- or two-word alias and
+    two of a longer one, where words the index doesn't know are mapped to
+    close vocabulary words through a character-trigram index. Lookups only
+    touch the words in the brand text, so they stay cheap with thousands of
+    entries.
+    """
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.phrases = {}                     # normalised alias -> entry index
+        self.alias_words = []                 # (entry index, words of one alias)
+        self.postings = defaultdict(set)      # word -> alias indexes containing it
+        self.trigrams = defaultdict(set)      # trigram -> vocabulary words
+        for index, entry in enumerate(self.entries):
+            for alias in business_type_aliases(entry.get("business_type", "")):
+                self.phrases.setdefault(alias, index)
+                words = tuple(alias.split())
+                for word in words:
+                    self.postings[word].add(len(self.alias_words))
+                self.alias_words.append((index, words))
+        for word in self.postings:
+            for gram in _trigrams(word):
+                self.trigrams[gram].add(word)
+        self.max_phrase_words = max((len(alias.split()) for alias in self.phrases), default=0)
+        self._fuzzy = lru_cache(maxsize=4096)(self._closest_word)
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_LOCALIZER_PATH):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _closest_word(self, word: str):
+        """
+        The known word closest to an unknown one (or None), scored only among
+        vocabulary words sharing at least two trigrams and the first letters with it.
+        """
+        counts = defaultdict(int)
+        for gram in _trigrams(word):
+            for candidate in self.trigrams.get(gram, ()):
+                counts[candidate] += 1
+        best, best_ratio = None, FUZZY_CUTOFF
+        for candidate, shared in sorted(counts.items()):
+            if shared < 2 or candidate[:FUZZY_PREFIX] != word[:FUZZY_PREFIX]:
+                continue
+            ratio = difflib.SequenceMatcher(None, word, candidate).ratio()
+            if ratio > best_ratio or (ratio == best_ratio and best is None):
+                best, best_ratio = candidate, ratio
+        return (best, best_ratio) if best else None
+
+    def _match(self, entry_index: int, method: str, score: float, words):
+        return {
+            "business_type": self.entries[entry_index].get("business_type"),
+            "entry": self.entries[entry_index],
+            "method": method,
+            "score": round(score, 3),
+            "matched_words": sorted(words),
+        }
+
+    def lookup(self, text):
+        """
+        Best entry for a free-text description, or None when nothing is close enough.
+        """
+        words = tokenize(text)
+        if not words:
+            return None
+
+        # 1. Exact business-type phrase anywhere in the text (longest phrase wins)
+        for size in range(min(self.max_phrase_words, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                phrase = " ".join(words[start:start + size])
+                if phrase in self.phrases and phrase not in GENERIC_WORDS:
+                    return self._match(self.phrases[phrase], "exact", 1.0, phrase.split())
+
+        # 2. Weighted word overlap; unknown words fall back to their closest known word.
+        # Adjacent pairs are tried joined too, so "day care" reaches "daycare".
+        # Generic words only count when the brand uses them as they are.
+        similarity = {}
+        for word in set(words) | {a + b for a, b in zip(words, words[1:])}:
+            if word in GENERIC_WORDS:
+                if word in self.postings:
+                    similarity[word] = 1.0
+                continue
+            if word in self.postings:
+                similarity[word] = 1.0
+            elif len(word) >= 4:
+                close = self._fuzzy(word)
+                if close and close[1] > similarity.get(close[0], 0.0):
+                    similarity[close[0]] = close[1]
+        candidates = set()
+        for word in similarity:
+            if word not in GENERIC_WORDS:
+                candidates |= self.postings[word]
+
+        best = None
+        for alias_index in sorted(candidates):
+            entry_index, alias_words = self.alias_words[alias_index]
+            matched = [word for word in alias_words if word in similarity]
+            # One word of a longer alias ("cleaning" of "cleaning service") is too weak a signal
+            if len(matched) < min(2, len(alias_words)):
+                continue
+            # Rare words identify a business type better than common ones
+            weights = {word: 1.0 / len(self.postings[word]) for word in alias_words}
+            score = sum(weights[word] * similarity[word] for word in matched) / sum(weights.values())
+            if best is None or score > best[0]:
+                best = (score, entry_index, matched)
+        if best is None or best[0] < MIN_SCORE:
+            return None
+        method = "token" if all(similarity[word] == 1.0 for word in best[2]) else "fuzzy"
+        return self._match(best[1], method, best[0], best[2])
+
+    def resolve(self, brand_data):
+        """
+        Match a brand: an explicit 'business_type' field is tried first; only
+        when it matches nothing are the name, traits, notes and origin searched together.
+        """
+        if brand_data.get("business_type"):
+            match = self.lookup(brand_data["business_type"])
+            if match:
+                return match
+        text = " ".join([
+            str(brand_data.get("name", "")),
+            " ".join(brand_data.get("key_traits", [])),
+            str(brand_data.get("notes", "")),
+            str(brand_data.get("origin", "")),
+        ])
+        return self.lookup(text)
+
+
+def format_localizer_context(match) -> str:
+    """
+    The prompt block handed to the SmallBusiness Localizer for a resolved entry.
+    """
+    if match is None:
+        return (
+            "No business-type template in small_business_localizer.json matches this brand. "
+            "Infer the business type, environment and scene constraints from the brand data and state your assumptions.\n"
+        )
+    entry = match["entry"]
+    constraints = entry.get("scene_constraints", {})
+    return (
+        f"BUSINESS-TYPE TEMPLATE (small_business_localizer.json, '{entry.get('business_type')}', {match['method']} match):\n"
+        f"Default scale: {entry.get('default_scale', 'unknown')}\n"
+        f"Client motivation: {entry.get('client_motivation', '')}\n"
+        f"Region hints: {', '.join(entry.get('region_hints', []))}\n"
+        f"Scene templates: {'; '.join(entry.get('scene_templates', []))}\n"
+        f"Scene constraints - avoid: {', '.join(constraints.get('avoid', []))}\n"
+        f"Scene constraints - include: {', '.join(constraints.get('include', []))}\n"
+    )
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_localizer_index(path: str = DEFAULT_LOCALIZER_PATH) -> LocalizerIndex:
+    """
+    One index per file per process, rebuilt only when the file changes.
+    A missing or unreadable file gives an empty index (nothing ever matches).
+    """
+    path = os.path.abspath(path)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+    with _indexes_lock:
+        cached = _indexes.get(path)
+        if cached is None or cached[0] != mtime:
+            try:
+                index = LocalizerIndex.from_file(path)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not load localizer templates from {path}: {e}")
+                index = LocalizerIndex([])
+            cached = _indexes[path] = (mtime, index)
+        return cached[1]
@@ -1,33 +1,172 @@
+import atexit
+import json
 import os
+import queue
+import re
+import threading
 from datetime import datetime
 
 import sys
 
+# File modes for TeeLogger
+LOG_FULL = "full"              # everything the console sees (previous behaviour)
+LOG_QUIET = "quiet"            # drop the decorated crewai verbose panels, strip ANSI codes
+LOG_STRUCTURED = "structured"  # quiet, written as JSON lines with timestamps
+LOG_MODES = (LOG_FULL, LOG_QUIET, LOG_STRUCTURED)
+
+ANSI_RE = re.compile(r"\x1b\[[0-9;?]*[ -/]*[@-~]")
+SEPARATOR_RE = re.compile(r"^[\u2500-\u259f\s]+$")      # panel borders and rules: only box-drawing/block characters
+SPINNER_RE = re.compile(r"^[\u2800-\u28ff]")               # braille spinner frames
+PANEL_SIDES = "│┃║"                                        # the vertical borders around panel text
+_CLOSE = object()
+
+
+class AsyncLogSink:
+    """
+    Non-blocking file writer: callers enqueue text and a background thread
+    writes it out in batches, rotating the file once it passes max_bytes
+    (crew_log.txt -> crew_log.txt.1 -> ... up to backup_count).
+    """
+
+    def __init__(self, filepath, mode="a", max_bytes=20 * 1024 * 1024, backup_count=3, batch_size=512):
+        self.filepath = filepath
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=10000)  # Blocks writers only if the disk falls far behind
+        self._file = open(filepath, mode, encoding="utf-8")
+        self._closed = False
+        self._failed = False  # after a write error the file is given up on, but the queue keeps draining
+        self._thread = threading.Thread(target=self._run, name=f"log-sink:{os.path.basename(filepath)}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, text):
+        if text and not self._closed:
+            self._queue.put(text)
+
+    def flush(self, wait=False):
+        """
+        Writes are flushed after every batch anyway; wait=True blocks until
+        everything queued so far is on disk.
+        """
+        if wait and not self._closed:
+            self._queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            closing = any(item is _CLOSE for item in batch)
+            try:
+                data = "".join(item for item in batch if item is not _CLOSE)
+                if data and not self._failed:
+                    self._file.write(data)
+                    self._file.flush()
+                    if self._file.tell() >= self.max_bytes:
+                        self._rotate()
+            except Exception as e:
+                # A full disk or a lost file must not stop the thread: the bounded queue would block the crew
+                self._failed = True
+                print(f"⚠️ Log file {self.filepath} is no longer written: {e}", file=sys.__stderr__)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if closing:
+                try:
+                    self._file.close()
+                except Exception:
+                    pass
+                return
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.filepath}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.filepath}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.filepath, f"{self.filepath}.1")
+        self._file = open(self.filepath, "w", encoding="utf-8")
+
+
+def is_verbose_chatter(line):
+    """
+    True for the purely decorative lines crewai's verbose mode draws:
+    panel borders, rules and spinner frames. Panel text is kept.
+    """
+    stripped = ANSI_RE.sub("", line).strip()
+    return bool(stripped) and bool(SEPARATOR_RE.match(stripped) or SPINNER_RE.match(stripped))
+
+
 class TeeLogger:
-    def __init__(self, filepath):
-        self.file = open(filepath, "a")
+    def __init__(self, filepath, file_mode=LOG_FULL):
+        if file_mode not in LOG_MODES:
+            raise ValueError(f"Unknown log mode '{file_mode}', expected one of {LOG_MODES}")
+        self.sink = AsyncLogSink(filepath)
         self.terminal = sys.stdout
+        self.file_mode = file_mode
+        self._partial = ""
 
     def write(self, message):
         self.terminal.write(message)
-        self.file.write(message)
+        if self.file_mode == LOG_FULL:
+            self.sink.write(message)
+            return
+        # Quiet/structured modes filter whole lines, so hold back any partial line
+        lines = (self._partial + message).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._write_line(line)
+
+    def _write_line(self, line):
+        if is_verbose_chatter(line):
+            return
+        had_ansi = bool(ANSI_RE.search(line))
+        line = ANSI_RE.sub("", line)
+        if line.strip()[:1] in PANEL_SIDES:
+            line = line.strip().strip(PANEL_SIDES).rstrip()  # keep a panel's text without its borders
+        if had_ansi and not line.strip():
+            return
+        if self.file_mode == LOG_STRUCTURED:
+            if line.strip():
+                self.sink.write(json.dumps({"ts": datetime.now().isoformat(timespec='milliseconds'), "msg": line}, ensure_ascii=False) + "\n")
+        else:
+            self.sink.write(line + "\n")
 
     def flush(self):
         self.terminal.flush()
-        self.file.flush()
 
     def close(self):
-        self.file.close()
-        
+        if self._partial and self.file_mode != LOG_FULL:
+            self._write_line(self._partial)
+            self._partial = ""
+        self.sink.close()
+
 class CrewLogger:
     def __init__(self, log_file="../flask-todo-generated/crew_log.txt"):
         self.log_file = os.path.abspath(log_file)
         os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+        self.sink = AsyncLogSink(self.log_file)
         self._write(f"\n\n🕓 Run started: {datetime.now()}\n{'='*60}")
 
     def log(self, content: str):
         self._write(content)
 
     def _write(self, content):
-        with open(self.log_file, "a") as f:
-            f.write(content + "\n")
+        self.sink.write(content + "\n")
+
+    def close(self):
+        self.sink.close()
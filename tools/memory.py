@@ -0,0 +1,125 @@
+import os
+import resource
+import sys
+import threading
+
+from tools.prompt_budget import compact_output
+
+# Bounded-memory mode: how much of each finished task's output stays in memory
+RETAINED_OUTPUT_TOKENS = int(os.environ.get("BOUNDED_OUTPUT_TOKENS", "600"))
+RSS_SAMPLE_SECONDS = 0.25
+
+
+def current_rss_bytes():
+    """
+    Resident set size of this process right now (Linux /proc), or None elsewhere.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def process_peak_rss_bytes() -> int:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssMonitor:
+    """
+    Samples this process's RSS in a background thread while a brand runs, so
+    long-lived batch workers get a peak per brand rather than ru_maxrss's
+    lifetime peak. Call start_monitoring()/stop() (or use it as a context manager).
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.start = self.peak = self.end = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss_bytes()
+        if rss is not None:
+            self.peak = max(self.peak or 0, rss)
+        return rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start_monitoring(self):
+        self.start = self._sample()
+        self._thread = threading.Thread(target=self._run, name="rss-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.end = self._sample()
+
+    def __enter__(self):
+        return self.start_monitoring()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def report(self) -> dict:
+        def mb(value):
+            return round(value / (1024 * 1024), 1) if value is not None else None
+
+        return {
+            "start_rss_mb": mb(self.start),
+            "peak_rss_mb": mb(self.peak),
+            "end_rss_mb": mb(self.end if self.end is not None else current_rss_bytes()),
+            "process_peak_rss_mb": mb(process_peak_rss_bytes()),
+        }
+
+
+class OutputSpill:
+    """
+    Bounded-memory mode: as soon as a task finishes (and its checkpoint holds
+    the full text on disk), its in-memory output is cut down to a summary of
+    at most `retain_tokens` plus a pointer to the checkpoint, and the agent's
+    accumulated tool results are dropped. Downstream tasks get that summary
+    as context. The last task is left alone since its output is the run's result.
+
+    Attach after the ContextBudget and before the CheckpointStore, so the
+    checkpoint is written first and the budget only ever sees the summary.
+    """
+
+    def __init__(self, checkpoint_dir: str, retain_tokens: int = RETAINED_OUTPUT_TOKENS):
+        self.checkpoint_dir = checkpoint_dir
+        self.retain_tokens = retain_tokens
+        self.spilled = []
+
+    def attach(self, tasks):
+        tasks = list(tasks)
+        for task in tasks[:-1]:
+            task.callback = self._callback_for(task, task.callback)
+
+    def _callback_for(self, task, previous_callback):
+        def callback(output):
+            self.spill(task, output)
+            if previous_callback:
+                previous_callback(output)
+        return callback
+
+    def spill(self, task, output):
+        summary = compact_output(task.name, output.raw, self.retain_tokens)
+        if summary != output.raw:
+            path = os.path.join(self.checkpoint_dir, f"{task.name}.json")
+            output.raw = f"{summary}\n[Full output: {path}]"
+            self.spilled.append(task.name)
+        for field in ("pydantic", "json_dict"):
+            if getattr(output, field, None) is not None:
+                setattr(output, field, None)
+        if getattr(output, "messages", None):
+            output.messages = []
+        agent = task.agent
+        if agent is not None and getattr(agent, "tools_results", None):
+            agent.tools_results = []
@@ -0,0 +1,194 @@
+import os
+import re
+import threading
+
+from tools.instrumentation import estimate_tokens
+
+# Per-task prompt budget (instructions + upstream context), in estimated tokens; 0 (the default) only measures
+DEFAULT_CONTEXT_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "0"))
+MIN_SUMMARY_TOKENS = 150  # never squeeze an upstream output below this
+
+HEX_COLOR_RE = re.compile(r"#[0-9a-fA-F]{6}\b|#[0-9a-fA-F]{3}\b")
+LIST_ITEM_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+HEADING_RE = re.compile(r"^\s*(?:#{1,6}\s+|\*\*[^*]+\*\*:?\s*$)")
+KEY_VALUE_RE = re.compile(r"^\s*\**[A-Z][\w /&-]{1,40}\**\s*:\s*\S")
+
+
+def _first_sentence(line: str, limit: int = 160) -> str:
+    line = re.sub(r"\s+", " ", line).strip()
+    match = re.match(r"(.+?[.!?])(\s|$)", line)
+    sentence = match.group(1) if match else line
+    return sentence if len(sentence) <= limit else sentence[:limit - 1].rstrip() + "…"
+
+
+def _outline(text: str) -> list:
+    """
+    Headings, list items and 'Key: value' lines, each cut to its first sentence.
+    """
+    lines = []
+    for line in text.splitlines():
+        if HEADING_RE.match(line) or LIST_ITEM_RE.match(line) or KEY_VALUE_RE.match(line):
+            lines.append(_first_sentence(line))
+    return list(dict.fromkeys(lines))
+
+
+def _themes(text: str) -> list:
+    items = [_first_sentence(LIST_ITEM_RE.sub("", line)) for line in text.splitlines()
+             if LIST_ITEM_RE.match(line) or HEADING_RE.match(line)]
+    return ["Themes:"] + [f"{index}. {item.strip('#* ')}" for index, item in enumerate(items, start=1)] if items else []
+
+
+def _palette(text: str) -> list:
+    """
+    A 'label | colours' table from every line that names hex colours.
+    """
+    rows = []
+    for line in text.splitlines():
+        colors = HEX_COLOR_RE.findall(line)
+        if colors:
+            label = _first_sentence(HEX_COLOR_RE.split(line)[0].strip(" -*•:|#"), limit=60) or "palette"
+            rows.append(f"{label} | {', '.join(dict.fromkeys(colors))}")
+    return ["Palette (label | colours):"] + rows if rows else []
+
+
+# Structured summary per task; anything else falls back to a plain outline
+SUMMARIZERS = {
+    "creative_synthesizer": _themes,
+    "vignette_designer": _themes,
+    "visual_stylist": _palette,
+}
+
+
+def compact_output(task_name: str, text: str, max_tokens: int) -> str:
+    """
+    Shrink one upstream output to roughly max_tokens, keeping its structure:
+    a task-specific summary (themes list, palette table) when one applies,
+    then the outline of headings/list items, then plain truncation.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    lines = []
+    summarizer = SUMMARIZERS.get(task_name)
+    if summarizer:
+        lines.extend(summarizer(text))
+    lines.extend(line for line in _outline(text) if line not in lines)
+    summary = "\n".join(lines) if lines else re.sub(r"\s+", " ", text)
+    max_chars = max_tokens * 4
+    if len(summary) > max_chars:
+        summary = summary[:max_chars - 1].rstrip() + "…"
+    return f"[Summary of {task_name} output, compacted to fit the prompt budget]\n{summary}"
+
+
+def task_instruction_tokens(task) -> int:
+    return estimate_tokens(task.description) + estimate_tokens(task.expected_output)
+
+
+class ContextBudget:
+    """
+    Keeps each task's prompt (its own instructions plus the upstream outputs
+    crewai passes as context) under `budget` estimated tokens.
+
+    Whenever a task completes, every task whose inputs are now all available
+    is checked; if it would go over budget upstream outputs are replaced in
+    place by structured summaries, those the task does not directly depend on
+    (per `dependencies`, task name -> names) first, oldest first. Upstream
+    means the task's explicit context when it has one (parallel process),
+    otherwise every earlier task. An output already counted for a task that
+    has not finished is not compacted further, so that task's figures hold.
+    The full text stays in the checkpoints (attach the budget before the
+    CheckpointStore so the checkpoint is written first).
+    """
+
+    def __init__(self, budget: int = DEFAULT_CONTEXT_BUDGET, dependencies=None):
+        self.budget = budget
+        self.dependencies = dependencies or {}
+        self.tasks = []
+        self.full_text = {}     # task name -> its original output, always compacted from
+        self.sent = {}          # task name -> context tokens it actually received
+        self.raw = {}           # task name -> context tokens it would have received uncompacted
+        self.inputs = {}        # task name -> the upstream tasks counted in its figures
+        self._lock = threading.Lock()  # async tasks complete on crewai's worker threads
+
+    def attach(self, tasks):
+        """
+        Chain a callback onto every task that rebalances the context for the tasks it unblocks.
+        """
+        self.tasks = list(tasks)
+        for task in self.tasks:
+            task.callback = self._callback_for(task.callback)
+
+    def _callback_for(self, previous_callback):
+        def callback(output):
+            if previous_callback:
+                previous_callback(output)
+            self.apply_ready()
+        return callback
+
+    def _upstream(self, index: int) -> list:
+        context = self.tasks[index].context
+        return list(context) if isinstance(context, list) else self.tasks[:index]
+
+    def apply_ready(self):
+        """
+        Apply the budget to every task that has not run yet but whose upstream
+        outputs all exist. Also called once before kickoff when resuming from checkpoints.
+        """
+        with self._lock:
+            for index, task in enumerate(self.tasks):
+                if task.output is None and task.name not in self.sent \
+                        and all(upstream.output is not None for upstream in self._upstream(index)):
+                    self.apply(index)
+
+    def apply(self, next_index: int):
+        """
+        Compact the upstream outputs of tasks[next_index] so it fits the budget.
+        """
+        if next_index >= len(self.tasks):
+            return
+        upstream = [task for task in self._upstream(next_index) if task.output is not None]
+        for task in upstream:
+            self.full_text.setdefault(task.name, task.output.raw)
+        next_task = self.tasks[next_index]
+        available = max(self.budget - task_instruction_tokens(next_task), MIN_SUMMARY_TOKENS * len(upstream))
+
+        def current():
+            return sum(estimate_tokens(task.output.raw) for task in upstream)
+
+        if self.budget > 0 and current() > available:
+            frozen = {upstream_task.name for name, inputs in self.inputs.items()
+                      if self._task(name).output is None for upstream_task in inputs}
+            direct = set(self.dependencies.get(next_task.name, []))
+            share = max(MIN_SUMMARY_TOKENS, available // max(1, len(upstream)))
+            order = {task.name: position for position, task in enumerate(self.tasks)}
+            for task in sorted(upstream, key=lambda t: (t.name in direct, order.get(t.name, 0))):
+                if current() <= available:
+                    break
+                if task.name not in frozen:
+                    task.output.raw = compact_output(task.name, self.full_text[task.name], share)
+        self.inputs[next_task.name] = upstream
+        self.sent[next_task.name] = current()
+        self.raw[next_task.name] = sum(estimate_tokens(self.full_text[task.name]) for task in upstream)
+
+    def _task(self, name: str):
+        return next(task for task in self.tasks if task.name == name)
+
+    def report(self):
+        """
+        Per-task instruction/context token counts and the tokens saved by compaction.
+        """
+        rows = []
+        for task in self.tasks:
+            raw = self.raw.get(task.name, 0)
+            sent = self.sent.get(task.name, 0)
+            rows.append({
+                "task": task.name,
+                "instruction_tokens": task_instruction_tokens(task),
+                "context_tokens_raw": raw,
+                "context_tokens_sent": sent,
+                "saved_tokens": raw - sent,
+            })
+        return {
+            "budget_tokens": self.budget,
+            "tasks": rows,
+            "saved_tokens": sum(row["saved_tokens"] for row in rows),
+        }
@@ -0,0 +1,248 @@
+from contextlib import nullcontext
+from typing import Any
+import time
+
+from crewai.llms.base_llm import BaseLLM
+from crewai.tools.base_tool import BaseTool
+
+from tools.instrumentation import estimate_cost, estimate_tokens, get_active_tracer
+from tools.resilience import CircuitOpenError, MAX_ATTEMPTS, call_with_resilience, is_retryable_error
+from tools.response_cache import ResponseCache, make_key, normalize_text
+
+try:
+    from crewai.llms.base_llm import call_stop_override
+except ImportError:  # Older crewai mutates llm.stop directly instead
+    call_stop_override = None
+
+
+class ProxyLLM(BaseLLM):
+    """
+    Pass-through wrapper around a real crewai LLM.
+
+    Subclasses override `_call` to add behaviour (caching, tracing, ...) around
+    the inner LLM. Everything else an agent asks of its LLM is delegated.
+    """
+
+    inner: Any
+
+    def __init__(self, inner, **kwargs):
+        super().__init__(
+            inner=inner,
+            model=getattr(inner, "model", "unknown"),
+            temperature=getattr(inner, "temperature", None),
+            **kwargs,
+        )
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        return self._call(messages, tools=tools, callbacks=callbacks,
+                          available_functions=available_functions, **kwargs)
+
+    def _call(self, messages, **kwargs):
+        # crewai applies the agent's stop words to the LLM it sees (this proxy), so
+        # forward them to the inner LLM for the duration of the call
+        stop = self.stop_sequences if call_stop_override else None
+        with call_stop_override(self.inner, stop) if stop else nullcontext():
+            return self.inner.call(messages, **kwargs)
+
+    def supports_function_calling(self) -> bool:
+        return self.inner.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
+
+    def get_token_usage_summary(self):
+        return self.inner.get_token_usage_summary()
+
+
+class ProxyTool(BaseTool):
+    """
+    Pass-through wrapper around a crewai tool that keeps its name, description
+    and argument schema. Subclasses override `_call` to add behaviour.
+    """
+
+    inner: Any
+
+    def __init__(self, inner, **kwargs):
+        super().__init__(
+            inner=inner,
+            name=inner.name,
+            description=inner.description,
+            args_schema=inner.args_schema,
+            **kwargs,
+        )
+
+    def _run(self, *args, **kwargs):
+        return self._call(*args, **kwargs)
+
+    def _call(self, *args, **kwargs):
+        return self.inner._run(*args, **kwargs)
+
+
+def _innermost(tool):
+    while isinstance(tool, ProxyTool):
+        tool = tool.inner
+    return tool
+
+
+def _usage_snapshot(llm):
+    try:
+        usage = llm.get_token_usage_summary()
+        return usage.prompt_tokens, usage.completion_tokens
+    except Exception:
+        return None
+
+
+def _messages_text(messages):
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(str(m.get("content", "")) for m in messages)
+
+
+class TracedLLM(ProxyLLM):
+    """
+    Records latency, tokens and estimated cost for every real model call.
+    Uses the provider's reported usage when available, otherwise estimates.
+    """
+
+    role: str
+
+    def _call(self, messages, **kwargs):
+        tracer = get_active_tracer()
+        if tracer is None:
+            return super()._call(messages, **kwargs)
+        before = _usage_snapshot(self.inner)
+        started = time.perf_counter()
+        error = None
+        result = None
+        try:
+            result = super()._call(messages, **kwargs)
+            return result
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            after = _usage_snapshot(self.inner)
+            prompt_tokens = completion_tokens = 0
+            if before and after:
+                prompt_tokens, completion_tokens = after[0] - before[0], after[1] - before[1]
+            if not prompt_tokens:
+                prompt_tokens = estimate_tokens(_messages_text(messages))
+                completion_tokens = estimate_tokens(result) if isinstance(result, str) else 0
+            task = kwargs.get("from_task")
+            cost = estimate_cost(self.model, prompt_tokens, completion_tokens)
+            tracer.record(
+                "llm_call",
+                agent=self.role,
+                task=getattr(task, "name", None),
+                model=self.model,
+                seconds=round(time.perf_counter() - started, 4),
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                cost_usd=round(cost, 6) if cost is not None else None,
+                error=error,
+            )
+
+
+class TracedTool(ProxyTool):
+    """
+    Records latency and success for every tool call. Tools in this repo report
+    failures as '❌ ...' strings, so those count as unsuccessful too.
+    """
+
+    role: str
+
+    def _call(self, *args, **kwargs):
+        tracer = get_active_tracer()
+        if tracer is None:
+            return super()._call(*args, **kwargs)
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = super()._call(*args, **kwargs)
+            ok = not (isinstance(result, str) and result.lstrip().startswith("❌"))
+            return result
+        finally:
+            tracer.record(
+                "tool_call",
+                agent=self.role,
+                tool=type(_innermost(self.inner)).__name__,
+                seconds=round(time.perf_counter() - started, 4),
+                ok=ok,
+            )
+
+
+class ResilientTool(ProxyTool):
+    """
+    Rate limits, retries and circuit-breaks calls to an external provider.
+    Transient failures are retried with backoff instead of reaching the agent;
+    once retries run out, or while the provider's circuit is open, the agent
+    gets one short '❌' line rather than a stack trace or an aborted crew.
+    """
+
+    provider: str
+
+    def _call(self, *args, **kwargs):
+        try:
+            return call_with_resilience(self.provider, lambda: super(ResilientTool, self)._call(*args, **kwargs))
+        except CircuitOpenError as e:
+            return f"❌ {self.name} is temporarily unavailable ({e}). Continue without it for now."
+        except Exception as e:
+            if not is_retryable_error(e):
+                raise
+            return f"❌ {self.name} failed after {MAX_ATTEMPTS} attempts: {e}"
+
+
+class CachedLLM(ProxyLLM):
+    """
+    Returns a stored reply when the same agent model/temperature sees the
+    same (normalised) prompt again. Only plain-text replies are cached;
+    native tool-call responses always go to the model.
+    """
+
+    cache: ResponseCache
+
+    def _call(self, messages, **kwargs):
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        tools = kwargs.get("tools") or []
+        key = make_key("llm", {
+            "model": self.model,
+            "temperature": self.temperature,
+            "stop": sorted(self.stop_sequences or []),
+            "tools": sorted(str(tool.get("name", tool)) if isinstance(tool, dict) else str(tool) for tool in tools),
+            "messages": [(m.get("role"), normalize_text(m.get("content", ""))) for m in messages],
+        })
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        result = super()._call(messages, **kwargs)
+        if isinstance(result, str):
+            self.cache.put(key, "llm", result)
+        return result
+
+
+class CachedTool(ProxyTool):
+    """
+    Returns a stored result for repeated calls with the same arguments.
+    """
+
+    cache: ResponseCache
+
+    def _call(self, *args, **kwargs):
+        key = make_key("tool", {
+            "tool": self.name,
+            "args": [normalize_text(arg) for arg in args],
+            "kwargs": {k: normalize_text(v) for k, v in kwargs.items()},
+        })
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        result = super()._call(*args, **kwargs)
+        # Failure messages (❌ ..., e.g. an outage outlasting ResilientTool's retries) are not worth keeping for the TTL
+        failed = isinstance(result, str) and result.lstrip().startswith("❌")
+        if isinstance(result, (str, dict, list)) and not failed:
+            self.cache.put(key, "tool", result)
+        return result
@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+
+# Registry of the tools roles.json can refer to. The real tool objects hold no
+# per-agent state, so each one is built once per process and shared by every
+# agent that lists it; only the thin per-role tracing/caching wrappers differ.
+# Nothing here imports crewai until a tool is actually built.
+
+
+def _search_tool():
+    from crewai_tools import SerperDevTool
+    # SERPER_BASE_URL points search at another endpoint (e.g. the benchmark's fake server)
+    serper_kwargs = {"base_url": os.environ["SERPER_BASE_URL"]} if os.environ.get("SERPER_BASE_URL") else {}
+    return SerperDevTool(**serper_kwargs)
+
+
+def _file_writer_tool():
+    from crewai_tools import FileWriterTool
+    return FileWriterTool()
+
+
+def _mood_board_tool():
+    from tools.image_downloader import MoodBoardImageTool
+    return MoodBoardImageTool()
+
+
+def _ad_prompt_tool():
+    from tools.ad_prompts import AdPromptTool
+    return AdPromptTool()
+
+
+TOOL_FACTORIES = {
+    "WebSearchTool": _search_tool,
+    "FileWriterTool": _file_writer_tool,
+    "MoodBoardImageTool": _mood_board_tool,
+    "AdPromptTool": _ad_prompt_tool,
+}
+
+# Search results are side-effect free, so they are safe to replay from the response cache
+CACHEABLE_TOOLS = {"WebSearchTool"}
+
+# Tools calling a rate-limited external API, by provider (see tools/resilience.py).
+# MoodBoardImageTool applies the same layer per image host inside its downloads.
+RESILIENT_TOOLS = {"WebSearchTool": "serper"}
+
+REQUIRED_ROLE_KEYS = ("role", "goal", "backstory")
+
+_tools = {}
+_tools_lock = threading.Lock()
+
+
+def get_tool(name: str):
+    """
+    The shared instance of a registered tool, built on first use.
+    """
+    with _tools_lock:
+        if name not in _tools:
+            if name not in TOOL_FACTORIES:
+                raise KeyError(f"Unknown tool '{name}', expected one of {sorted(TOOL_FACTORIES)}")
+            _tools[name] = TOOL_FACTORIES[name]()
+        return _tools[name]
+
+
+def tools_for_role(role_name: str, tool_names, cache=None):
+    """
+    Traced wrappers around the shared tools a role uses (cached too when a
+    response cache is given and the tool is side-effect free). External API
+    tools also get rate limiting, retries and a circuit breaker, inside the
+    tracing so a traced call covers all of its attempts.
+    """
+    from tools.proxies import CachedTool, ResilientTool, TracedTool
+
+    tools = []
+    for name in tool_names:
+        if name not in TOOL_FACTORIES:
+            print(f"⚠️ Skipping unknown tool '{name}' for role {role_name}")
+            continue
+        tool = get_tool(name)
+        if name in RESILIENT_TOOLS:
+            tool = ResilientTool(tool, provider=RESILIENT_TOOLS[name])
+        tool = TracedTool(tool, role=role_name)
+        if cache is not None and name in CACHEABLE_TOOLS:
+            tool = CachedTool(tool, cache=cache)
+        tools.append(tool)
+    return tools
+
+
+_role_specs = {}
+
+
+def load_role_specs(json_path: str):
+    """
+    Parsed roles.json, re-read only when the file changes.
+    """
+    path = os.path.abspath(json_path)
+    mtime = os.path.getmtime(path)
+    cached = _role_specs.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path) as f:
+            cached = _role_specs[path] = (mtime, json.load(f))
+    return cached[1]
+
+
+def validate_role_specs(roles):
+    """
+    Return a list of problems with the role definitions (empty when valid).
+    """
+    if not isinstance(roles, list):
+        return ["roles must be a JSON list of role objects"]
+    problems = []
+    seen = set()
+    for index, role in enumerate(roles):
+        if not isinstance(role, dict):
+            problems.append(f"role #{index} is not an object")
+            continue
+        label = role.get("role", f"#{index}")
+        for key in REQUIRED_ROLE_KEYS:
+            if not role.get(key):
+                problems.append(f"role {label}: missing '{key}'")
+        if label in seen:
+            problems.append(f"role {label}: defined more than once")
+        seen.add(label)
+        for name in role.get("tools", []):
+            if name not in TOOL_FACTORIES:
+                problems.append(f"role {label}: unknown tool '{name}'")
+    return problems
@@ -0,0 +1,256 @@
+from urllib.parse import urlparse
+import os
+import random
+import threading
+import time
+
+import requests
+
+# Statuses worth retrying: throttling and transient server/gateway errors
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+MAX_ATTEMPTS = int(os.environ.get("API_MAX_ATTEMPTS", "4"))
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 20.0
+BREAKER_FAILURES = 5            # consecutive failures before a circuit opens
+BREAKER_COOLDOWN_SECONDS = 30.0  # how long an open circuit fails fast before one trial call
+
+# Token buckets as (requests per second, burst). Keys are providers or hostnames;
+# anything not listed gets the default. Limits are per process (see set_rate_share).
+DEFAULT_RATE_LIMIT = (float(os.environ.get("API_RATE_PER_SECOND", "5")), 10)
+RATE_LIMITS = {
+    "serper": (float(os.environ.get("SERPER_RATE_PER_SECOND", "5")), 5),
+}
+
+COUNTERS = ("calls", "retries", "failures", "short_circuits", "circuit_opens", "throttled_seconds")
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised instead of calling an endpoint whose circuit is open.
+    A ConnectionError so existing network-error handling covers it.
+    """
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping until one is available. Returns the seconds waited.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class CircuitBreaker:
+    """
+    Closed until BREAKER_FAILURES consecutive failures, then open (fail fast)
+    for the cooldown; after that a single trial call decides whether it closes
+    again or reopens.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN_SECONDS):
+        self.threshold = failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_running or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self) -> bool:
+        """
+        Count a failure; returns True when this failure opened the circuit.
+        """
+        with self._lock:
+            self.failures += 1
+            was_trial = self.trial_running
+            self.trial_running = False
+            if was_trial or (self.opened_at is None and self.failures >= self.threshold):
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def remaining(self) -> float:
+        with self._lock:
+            return max(0.0, self.cooldown - (time.monotonic() - self.opened_at)) if self.opened_at else 0.0
+
+
+class Endpoint:
+    """
+    Rate limiter, circuit breaker and counters for one provider or host.
+    """
+
+    def __init__(self, key: str, rate_share: float = 1.0):
+        rate, burst = RATE_LIMITS.get(key, DEFAULT_RATE_LIMIT)
+        self.key = key
+        self.bucket = TokenBucket(rate * rate_share, max(1.0, burst * rate_share))
+        self.breaker = CircuitBreaker()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._lock = threading.Lock()
+
+    def count(self, name: str, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+_rate_share = 1.0
+
+
+def set_rate_share(share: float):
+    """
+    Scale every rate limit by `share`, e.g. 1/workers in each batch worker
+    process so the pool as a whole stays within the provider's limits.
+    """
+    global _rate_share
+    with _endpoints_lock:
+        _rate_share = share
+        _endpoints.clear()
+
+
+def get_endpoint(key: str) -> Endpoint:
+    with _endpoints_lock:
+        if key not in _endpoints:
+            _endpoints[key] = Endpoint(key, _rate_share)
+        return _endpoints[key]
+
+
+def backoff_seconds(attempt: int, retry_after=None) -> float:
+    """
+    Full-jitter exponential backoff, or the server's Retry-After when it gives one.
+    """
+    if retry_after is not None and str(retry_after).strip().isdigit():
+        return min(BACKOFF_MAX_SECONDS, float(retry_after))
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempt - 1)))
+
+
+def is_retryable_error(error) -> bool:
+    """
+    Network errors, timeouts and retryable HTTP statuses, also when wrapped
+    in another exception (tools often re-raise as RuntimeError).
+    """
+    while error is not None:
+        if isinstance(error, CircuitOpenError):
+            return False
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+            return error.response.status_code in RETRYABLE_STATUSES
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def call_with_resilience(key: str, fn, retry_result=None, retry_error=is_retryable_error):
+    """
+    Call `fn()` through the endpoint's circuit breaker and rate limiter,
+    retrying with backoff while `retry_error(exception)` or `retry_result(result)`
+    says the failure is transient. Raises CircuitOpenError without calling
+    `fn` while the endpoint's circuit is open. When retries run out the last
+    exception is raised, or the last result returned.
+    """
+    endpoint = get_endpoint(key)
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        if not endpoint.breaker.allow():
+            endpoint.count("short_circuits")
+            raise CircuitOpenError(f"{key} is failing, circuit open for another {endpoint.breaker.remaining():.0f}s")
+        endpoint.count("throttled_seconds", endpoint.bucket.acquire())
+        endpoint.count("calls")
+        retry_after = None
+        try:
+            result = fn()
+        except Exception as e:
+            if not retry_error(e):
+                # A non-retryable answer (bad request, invalid URL) still means the host is reachable;
+                # recording it also frees a half-open circuit's trial slot
+                endpoint.breaker.record_success()
+                raise
+            endpoint.count("failures")
+            if endpoint.breaker.record_failure():
+                endpoint.count("circuit_opens")
+            if attempt == MAX_ATTEMPTS:
+                raise
+        else:
+            if retry_result is None or not retry_result(result):
+                endpoint.breaker.record_success()
+                return result
+            endpoint.count("failures")
+            if endpoint.breaker.record_failure():
+                endpoint.count("circuit_opens")
+            if attempt == MAX_ATTEMPTS:
+                return result
+            headers = getattr(result, "headers", None) or {}
+            retry_after = headers.get("retry-after")
+            if hasattr(result, "close"):
+                result.close()
+        endpoint.count("retries")
+        time.sleep(backoff_seconds(attempt, retry_after))
+
+
+def resilient_request(session, method: str, url: str, **kwargs):
+    """
+    session.request() rate limited, retried and circuit-broken per host.
+    Retryable statuses come back as the final response once retries run out.
+    """
+    host = urlparse(url).netloc.lower()
+    return call_with_resilience(
+        host,
+        lambda: session.request(method, url, **kwargs),
+        retry_result=lambda response: response.status_code in RETRYABLE_STATUSES,
+    )
+
+
+def resilience_stats():
+    """
+    Counters per provider/host for this process.
+    """
+    with _endpoints_lock:
+        endpoints = list(_endpoints.values())
+    stats = {}
+    for endpoint in endpoints:
+        with endpoint._lock:
+            stats[endpoint.key] = dict(endpoint.counters)
+        stats[endpoint.key]["circuit_open"] = endpoint.breaker.remaining() > 0
+    return stats
+
+
+def stats_since(before) -> dict:
+    """
+    Counter deltas since an earlier resilience_stats() snapshot, for one run's report.
+    """
+    delta = {}
+    for key, counters in resilience_stats().items():
+        previous = before.get(key, {})
+        row = {name: counters[name] - previous.get(name, 0) for name in COUNTERS}
+        if row["calls"] or row["short_circuits"]:
+            row["throttled_seconds"] = round(row["throttled_seconds"], 3)
+            row["circuit_open"] = counters["circuit_open"]
+            delta[key] = row
+    return delta
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH", ".cache/responses.sqlite")
+DEFAULT_TTL_SECONDS = int(os.environ.get("RESPONSE_CACHE_TTL_HOURS", "168")) * 3600
+DEFAULT_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+# Cache modes selectable from the CLI
+CACHE_USE = "use"          # read hits, write misses
+CACHE_REFRESH = "refresh"  # ignore hits, overwrite with fresh responses
+CACHE_OFF = "off"          # bypass the cache entirely
+CACHE_MODES = (CACHE_USE, CACHE_REFRESH, CACHE_OFF)
+
+
+def normalize_text(text) -> str:
+    return re.sub(r"\s+", " ", str(text)).strip()
+
+
+def make_key(kind: str, payload: dict) -> str:
+    """
+    Stable hash of a call: whitespace-normalised, key-sorted JSON.
+    """
+    blob = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(f"{kind}:{blob}".encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed store for LLM and tool responses with TTL and size-based
+    (least recently used) eviction. Safe to share between threads and between
+    the batch worker processes.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES, mode: str = CACHE_USE):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{mode}', expected one of {CACHE_MODES}")
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        if mode != CACHE_OFF:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, kind TEXT, value TEXT, size INTEGER, "
+                "created_at REAL, last_access REAL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str):
+        if self.mode != CACHE_USE:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, key: str, kind: str, value):
+        if self.mode == CACHE_OFF:
+            return
+        data = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, data, len(data), now, now),
+            )
+            self._conn.commit()
+        self.evict()
+
+    def evict(self):
+        """
+        Drop expired rows, then least recently used rows until under max_bytes.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                freed = 0
+                stale = []
+                for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+                    if total - freed <= self.max_bytes:
+                        break
+                    stale.append((key,))
+                    freed += size
+                self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+            self._conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(mode: str = CACHE_USE) -> ResponseCache:
+    """
+    One cache connection per mode per process.
+    """
+    with _caches_lock:
+        if mode not in _caches:
+            _caches[mode] = ResponseCache(mode=mode)
+        return _caches[mode]
@@ -0,0 +1,58 @@
+PROCESS_SEQUENTIAL = "sequential"  # every task runs in turn and sees every earlier output
+PROCESS_PARALLEL = "parallel"      # independent tasks run concurrently, each sees only its dependencies
+PROCESS_MODES = (PROCESS_SEQUENTIAL, PROCESS_PARALLEL)
+
+
+def _name(task):
+    return task["name"] if isinstance(task, dict) else task.name
+
+
+def execution_waves(tasks, dependencies):
+    """
+    Group tasks into waves: every task's dependencies are in an earlier wave,
+    so the tasks within one wave can run at the same time. Dependencies on
+    tasks that are not in the plan (e.g. the Localizer for non-small brands)
+    are ignored. Raises ValueError on unknown task names or a cycle.
+    """
+    names = [_name(task) for task in tasks]
+    missing = [name for name in names if name not in dependencies]
+    if missing:
+        raise ValueError(f"no dependencies declared for task(s): {', '.join(missing)}")
+    pending = {name: [dep for dep in dependencies[name] if dep in names] for name in names}
+    by_name = dict(zip(names, tasks))
+    waves = []
+    done = set()
+    while pending:
+        ready = [name for name in names if name in pending and all(dep in done for dep in pending[name])]
+        if not ready:
+            raise ValueError(f"dependency cycle between: {', '.join(pending)}")
+        waves.append([by_name[name] for name in ready])
+        done.update(ready)
+        for name in ready:
+            del pending[name]
+    return waves
+
+
+def apply_dependency_graph(tasks, dependencies):
+    """
+    Rewire crewai tasks for the parallel process and return them in run order.
+
+    Each task's context becomes just its declared dependencies. Tasks sharing
+    a wave are marked async so crewai starts them together. crewai makes every
+    synchronous task wait for all pending async tasks first, so the next
+    synchronous task is the join. When two multi-task waves follow each other,
+    the last task of the first wave stays synchronous so the second wave never
+    starts before its inputs exist; that task then only starts once the rest
+    of its wave has finished, so such a wave is only partly concurrent.
+    """
+    waves = execution_waves(tasks, dependencies)
+    by_name = {task.name: task for task in tasks}
+    ordered = []
+    for index, wave in enumerate(waves):
+        next_wave = waves[index + 1] if index + 1 < len(waves) else []
+        needs_join = len(wave) > 1 and (len(next_wave) != 1)
+        for position, task in enumerate(wave):
+            task.context = [by_name[dep] for dep in dependencies[task.name] if dep in by_name]
+            task.async_execution = len(wave) > 1 and not (needs_join and position == len(wave) - 1)
+        ordered.extend(wave)
+    return ordered